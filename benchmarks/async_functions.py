@@ -0,0 +1,68 @@
+"""
+Compares evaluating an expression whose functions are I/O-bound lookups, taking `LATENCY` seconds each, using blocking
+functions and `evaluate`, against coroutine functions and `evaluate_async`, which awaits independent calls concurrently.
+
+Run it from the repository root using: `PYTHONPATH=src python benchmarks/async_functions.py`
+"""
+
+import asyncio
+import time
+
+from typing import List
+
+from kharazmi import EquationParser, register_function
+from kharazmi.types import TypedValue
+
+
+LATENCY = 0.01
+EXPRESSION = "amount * rate(currency) + fee(region) - discount(tier, rate(currency))"
+ROWS = [{"amount": i, "currency": i % 3, "region": i % 5, "tier": i % 2} for i in range(50)]
+
+
+def blocking_lookup(*arguments: TypedValue) -> TypedValue:
+    time.sleep(LATENCY)
+    return sum(arguments) + 1
+
+
+async def lookup(*arguments: TypedValue) -> TypedValue:
+    await asyncio.sleep(LATENCY)
+    return sum(arguments) + 1
+
+
+async def evaluate_rows() -> List[TypedValue]:
+    expression = EquationParser(list_factory=list).parse(EXPRESSION)
+    return await asyncio.gather(*(expression.evaluate_async(**row) for row in ROWS))
+
+
+def main() -> None:
+    parser = EquationParser(list_factory=list)
+
+    for name in ("rate", "fee", "discount"):
+        register_function(name, blocking_lookup)
+
+    expression = parser.parse(EXPRESSION)
+    start = time.perf_counter()
+    expected = [expression.evaluate(**row) for row in ROWS]
+    blocking_time = time.perf_counter() - start
+
+    for name in ("rate", "fee", "discount"):
+        register_function(name, lookup)
+
+    start = time.perf_counter()
+    single = asyncio.run(expression.evaluate_async(**ROWS[0]))
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = asyncio.run(evaluate_rows())
+    async_time = time.perf_counter() - start
+
+    assert single == expected[0] and results == expected
+
+    print(f"{len(ROWS)} rows, 4 lookups of {LATENCY * 1e3:.0f}ms per row")
+    print(f"evaluate, blocking functions: {blocking_time * 1e3:8.1f}ms")
+    print(f"evaluate_async, a single row: {single_time * 1e3:8.1f}ms  (`discount` waits for the `rate` in its arguments)")
+    print(f"evaluate_async, all rows:     {async_time * 1e3:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Compares evaluating an expression row by row against evaluating it over whole columns using the numpy engine.
+
+Run it from the repository root using: `PYTHONPATH=src python benchmarks/columnar.py`
+"""
+
+import random
+import timeit
+
+import numpy as np
+
+from kharazmi import EquationParser
+from kharazmi.columnar import vectorize
+
+
+EXPRESSION = 'if x > 0.5 then 2*x + y else -y. + (c in ["a", "b"])'
+
+# numpy turns lists of numbers and strings into arrays of strings, which mustn't change the results of `IN`.
+MIXED_LISTS = ['n in [1, "a"]', 'n not in [1, "a"]', 'c in [2, "b", true]', 'n in [1, 2.5]']
+
+
+def main() -> None:
+    parser = EquationParser(list_factory=list)
+    columns = {"n": np.array([1, 2]), "c": np.array(["a", "b"])}
+
+    for formula in MIXED_LISTS:
+        mixed = parser.parse(formula)
+        assert mixed is not None
+        expected = [mixed.evaluate(n=n, c=c) for n, c in zip([1, 2], ["a", "b"])]
+        assert vectorize(mixed)(columns).tolist() == expected, formula
+    expression = parser.parse(EXPRESSION)
+    assert expression is not None
+
+    for size in (1_000, 10_000, 100_000):
+        rows = [{"x": random.random(), "y": random.random(), "c": random.choice("abcd")} for _ in range(size)]
+        columns = {name: np.array([row[name] for row in rows]) for name in ("x", "y", "c")}
+
+        compiled = expression.compile()
+        vectorized = vectorize(expression)
+
+        assert np.allclose([compiled(**row) for row in rows], vectorized(columns))
+
+        rows_time = min(timeit.repeat(lambda: list(expression.evaluate_many(rows)), number=1, repeat=3))
+        columns_time = min(timeit.repeat(lambda: vectorized(columns), number=1, repeat=3))
+
+        print(
+            f"rows={size:<8} "
+            f"evaluate_many: {rows_time * 1e3:9.2f}ms  "
+            f"columnar: {columns_time * 1e3:9.2f}ms  "
+            f"speedup: {rows_time / columns_time:7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
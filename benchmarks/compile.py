@@ -0,0 +1,65 @@
+"""
+Compares tree-walking `evaluate` against the callable returned by `compile`, the code object built by
+`kharazmi.codegen.generate` and the program lowered by `kharazmi.vm.lower`, on deep chains of additions and
+multiplications.
+
+Run it from the repository root using: `PYTHONPATH=src python benchmarks/compile.py`
+"""
+
+import timeit
+
+from kharazmi.codegen import generate
+from kharazmi.models import BaseExpression, Number, Variable
+from kharazmi.vm import lower
+
+
+def addition_chain(depth: int) -> BaseExpression:
+    expression: BaseExpression = Variable("x0")
+
+    for i in range(1, depth):
+        expression = expression + Variable(f"x{i}")
+
+    return expression
+
+
+def multiplication_chain(depth: int) -> BaseExpression:
+    expression: BaseExpression = Variable("x0")
+
+    for i in range(1, depth):
+        expression = expression * Variable(f"x{i}") + Number("1")
+
+    return expression
+
+
+def run(name: str, expression: BaseExpression, depth: int, number: int) -> None:
+    values = {f"x{i}": 1.0001 for i in range(depth)}
+    compiled = expression.compile()
+    generated = generate(expression)
+    program = lower(expression)
+
+    assert compiled(**values) == generated(**values) == program(**values) == expression.evaluate(**values)
+
+    evaluate_time = min(timeit.repeat(lambda: expression.evaluate(**values), number=number, repeat=3))
+    compiled_time = min(timeit.repeat(lambda: compiled(**values), number=number, repeat=3))
+    generated_time = min(timeit.repeat(lambda: generated(**values), number=number, repeat=3))
+    program_time = min(timeit.repeat(lambda: program(**values), number=number, repeat=3))
+
+    print(
+        f"{name:<16} depth={depth:<4} "
+        f"evaluate: {evaluate_time / number * 1e6:9.2f}us  "
+        f"compiled: {compiled_time / number * 1e6:9.2f}us  "
+        f"generated: {generated_time / number * 1e6:9.2f}us  "
+        f"vm: {program_time / number * 1e6:9.2f}us  "
+        f"speedup: {evaluate_time / compiled_time:5.2f}x / {evaluate_time / generated_time:5.2f}x / "
+        f"{evaluate_time / program_time:5.2f}x"
+    )
+
+
+def main() -> None:
+    for depth in (10, 50, 100):
+        run("addition", addition_chain(depth), depth, number=100)
+        run("multiplication", multiplication_chain(depth), depth, number=100)
+
+
+if __name__ == "__main__":
+    main()
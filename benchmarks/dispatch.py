@@ -0,0 +1,52 @@
+"""
+Measures the overhead of each operator's `_apply`, which checks its operands against the protocols in
+`kharazmi.types` before applying the operator, for a few operand types.
+
+Run it from the repository root using: `PYTHONPATH=src python benchmarks/dispatch.py`
+"""
+
+import timeit
+
+from typing import Any, Callable, List, Tuple
+
+import numpy as np
+
+from kharazmi.models import (AdditionExpression, AndExpression, BaseExpression, ContainsExpression,
+                             DivisionExpression, EqualExpression, LengthExpression, LessThanExpression,
+                             MultiplicationExpression, NegativeExpression, NotEqualExpression, NotExpression, Number)
+
+
+NUMBER = Number("1")
+
+CASES: List[Tuple[str, BaseExpression, Tuple[Any, ...]]] = [
+    ("+ (int)", AdditionExpression(NUMBER, NUMBER), (2, 3)),
+    ("+ (str)", AdditionExpression(NUMBER, NUMBER), ("a", "b")),
+    ("+ (list)", AdditionExpression(NUMBER, NUMBER), ([1], [2])),
+    ("+ (ndarray)", AdditionExpression(NUMBER, NUMBER), (np.ones(4), np.ones(4))),
+    ("* (float)", MultiplicationExpression(NUMBER, NUMBER), (2.5, 3.5)),
+    ("/ (int)", DivisionExpression(NUMBER, NUMBER), (2, 3)),
+    ("< (int)", LessThanExpression(NUMBER, NUMBER), (2, 3)),
+    ("== (int)", EqualExpression(NUMBER, NUMBER), (2, 3)),
+    ("== (str)", EqualExpression(NUMBER, NUMBER), ("a", "b")),
+    ("== (list)", EqualExpression(NUMBER, NUMBER), ([1], [2])),
+    ("!= (list)", NotEqualExpression(NUMBER, NUMBER), ([1], [2])),
+    ("&& (bool)", AndExpression(NUMBER, NUMBER), (True, False)),
+    ("&& (ndarray)", AndExpression(NUMBER, NUMBER), (np.ones(4, bool), np.zeros(4, bool))),
+    ("in (list)", ContainsExpression(NUMBER, NUMBER), (1, [1, 2])),
+    ("- (int)", NegativeExpression(NUMBER), (2,)),
+    ("! (ndarray)", NotExpression(NUMBER), (np.ones(4, bool),)),
+    ("length of (str)", LengthExpression(NUMBER), ("abc",)),
+]
+
+
+def main() -> None:
+    number = 2_000
+
+    for name, expression, operands in CASES:
+        apply: Callable[..., Any] = getattr(expression, "_apply")
+        elapsed = min(timeit.repeat(lambda: apply(*operands), number=number, repeat=3))
+        print(f"{name:<16} {elapsed / number * 1e6:9.2f}us")
+
+
+if __name__ == "__main__":
+    main()
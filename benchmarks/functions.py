@@ -0,0 +1,53 @@
+"""
+Measures the cost of function calls in each engine, on an expression calling a registered function 200 times, and
+checks that parsers with registries of their own call their own functions.
+
+Function calls are resolved once, when the expression is compiled (or generated, or lowered), so the engines other
+than `evaluate` don't look functions up while evaluating.
+
+Run it from the repository root using: `PYTHONPATH=src python benchmarks/functions.py`
+"""
+
+import math
+import timeit
+
+from kharazmi import EquationParser, FunctionRegistry, register_function
+from kharazmi.codegen import generate
+from kharazmi.vm import lower
+
+
+CALLS = 200
+
+
+def main() -> None:
+    register_function("f", abs)
+
+    expression = EquationParser(list_factory=list).parse(" + ".join(f"f(x{i % 10})" for i in range(CALLS)))
+    assert expression is not None
+    values = {f"x{i}": -i for i in range(10)}
+
+    engines = {
+        "evaluate": lambda: expression.evaluate(**values),
+        "compile": lambda compiled=expression.compile(): compiled(**values),
+        "generate": lambda generated=generate(expression): generated(**values),
+        "lower": lambda program=lower(expression): program(**values),
+    }
+
+    for name, engine in engines.items():
+        assert engine() == 900
+        elapsed = min(timeit.repeat(engine, number=200, repeat=7)) / 200
+        print(f"{name:<9} {elapsed * 1e6:8.1f}us  ({elapsed / CALLS * 1e9:6.1f}ns per term)")
+
+    tenant = EquationParser(list_factory=list, functions=FunctionRegistry({"f": math.sqrt}))
+    assert tenant.parse("f(x)").compile()(x=16) == 4.0
+    assert EquationParser(list_factory=list).parse("f(x)").compile()(x=-16) == 16
+
+    try:
+        tenant.parse("f(x) + g(x)").compile()
+        raise AssertionError("Compiling a call to an unknown function should fail.")
+    except ValueError as e:
+        print(f"compiling an unknown function: {e}")
+
+
+if __name__ == "__main__":
+    main()
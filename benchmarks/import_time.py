@@ -0,0 +1,55 @@
+"""
+Measures how long a fresh python process takes to import kharazmi, and to get a parser ready, with and without the
+parsing tables cached on disk.
+
+Run it from the repository root using: `PYTHONPATH=src python benchmarks/import_time.py`
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from typing import Dict
+
+
+REPEAT = 10
+
+STATEMENTS = {
+    "import kharazmi": "import kharazmi",
+    "import EquationParser": "from kharazmi import EquationParser",
+    "first parse": "from kharazmi import EquationParser; EquationParser(list_factory=list).parse('2*x + 1')",
+}
+
+
+def run(statement: str, environment: Dict[str, str]) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", statement], env=environment, check=True)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    baseline = min(run("pass", dict(os.environ)) for _ in range(REPEAT))
+    print(f"{'python startup':<24} {baseline * 1e3:8.2f}ms")
+
+    with tempfile.TemporaryDirectory() as cache_directory:
+        environment = {**os.environ, "KHARAZMI_CACHE_DIR": cache_directory}
+
+        for name, statement in STATEMENTS.items():
+            cold = []
+
+            for _ in range(REPEAT):
+                for entry in os.listdir(cache_directory):
+                    os.remove(os.path.join(cache_directory, entry))
+
+                cold.append(run(statement, environment))
+
+            warm = [run(statement, environment) for _ in range(REPEAT)]
+
+            print(f"{name:<24} cold cache: {(min(cold) - baseline) * 1e3:8.2f}ms  "
+                  f"warm cache: {(min(warm) - baseline) * 1e3:8.2f}ms  (on top of python's startup)")
+
+
+if __name__ == "__main__":
+    main()
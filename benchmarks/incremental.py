@@ -0,0 +1,92 @@
+"""
+Compares updating one variable of a large formula, made of many independent terms each calling a registered function,
+using `IncrementalEvaluator`, against evaluating the whole formula again, and checks both give the same results.
+
+Only the term whose variable changed should call its function again.
+
+Run it from the repository root using: `PYTHONPATH=src python benchmarks/incremental.py`
+"""
+
+import random
+import timeit
+
+from kharazmi import EquationParser, FunctionRegistry
+from kharazmi.incremental import IncrementalEvaluator
+from kharazmi.optimizer import eliminate_common_subexpressions
+
+
+TERMS = 200
+UPDATES = 2_000
+
+
+def main() -> None:
+    calls = 0
+
+    def rate(value):
+        nonlocal calls
+        calls += 1
+        return value * 1.5
+
+    parser = EquationParser(list_factory=list, functions=FunctionRegistry({"rate": rate}))
+    formula = " + ".join(f"if x{i} > 0 then rate(x{i}) * w{i % 7} else -x{i}." for i in range(TERMS))
+    expression = parser.parse(formula)
+    assert expression is not None
+
+    random.seed(0)
+    values = {f"x{i}": random.uniform(-1, 1) for i in range(TERMS)}
+    values.update({f"w{i}": float(i) for i in range(7)})
+    updates = [(f"x{random.randrange(TERMS)}", random.uniform(-1, 1)) for _ in range(UPDATES)]
+
+    compiled = expression.compile()
+    incremental = IncrementalEvaluator(expression)
+    assert incremental.update(**values) == compiled(**values)
+
+    for name, value in updates[:200]:
+        values[name] = value
+        calls = 0
+        result = incremental.update(**{name: value})
+        assert calls <= 1, calls
+        assert result == compiled(**values)
+
+    # Giving all of the variables again, with one of them changed, is as cheap as giving only that one.
+    name, value = updates[200]
+    values[name] = value
+    calls = 0
+    result = incremental.update(**values)
+    assert calls <= 1 and result == compiled(**values)
+
+    # A variable used by many terms invalidates all of them.
+    calls = 0
+    values["w3"] = 10.0
+    result = incremental.update(w3=10.0)
+    print(f"changing w3, used by {TERMS // 7} terms, called rate {calls} times")
+    assert result == compiled(**values)
+
+    # Nodes shared between several parents are kept once.
+    merged = eliminate_common_subexpressions(parser.parse("rate(a*b) + rate(a*b) * c"), merge_function_calls=True)
+    shared = IncrementalEvaluator(merged)
+    calls = 0
+    assert shared.update(a=2, b=3, c=1) == 18.0 and calls == 1
+    assert shared.update(c=2) == 27.0 and calls == 1
+
+    # 0.0 and -0.0 are equal, but they're different inputs.
+    signed = IncrementalEvaluator(parser.parse("x * 2"))
+    assert repr(signed.update(x=0.0)) == "0.0" and repr(signed.update(x=-0.0)) == "-0.0"
+    assert repr(signed.variables_values["x"]) == "-0.0"
+
+    def update_incrementally():
+        for name, value in updates:
+            incremental.update(**{name: value})
+
+    def evaluate_again():
+        for name, value in updates:
+            values[name] = value
+            compiled(**values)
+
+    for name, run in [("compile", evaluate_again), ("incremental", update_incrementally)]:
+        elapsed = min(timeit.repeat(run, number=1, repeat=5)) / UPDATES
+        print(f"{name:<12} {elapsed * 1e6:8.1f}us per update")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Measures how long lexing, and parsing, long formulas and large list literals takes.
+
+Run it from the repository root using: `PYTHONPATH=src python benchmarks/lexer.py`
+"""
+
+import timeit
+
+from kharazmi import EquationParser
+from kharazmi.lexer import EquationLexer
+
+
+def long_formula(terms: int) -> str:
+    return " + ".join(
+        f"x{i} * {i}.5 is greater than or equal y{i}" if i % 2 else f"length of z{i} ^ 2" for i in range(terms)
+    )
+
+
+def list_literal(items: int) -> str:
+    return "x in [" + ", ".join(str(i) if i % 3 else f'"item {i}"' for i in range(items)) + "]"
+
+
+def main() -> None:
+    lexer = EquationLexer()
+    parser = EquationParser(list_factory=list)
+
+    for name, text in [("formula (1k terms)", long_formula(1_000)), ("list (2k items)", list_literal(2_000))]:
+        token_count = sum(1 for _ in lexer.tokenize(text))
+        number = 20
+
+        lexing = min(timeit.repeat(lambda: sum(1 for _ in lexer.tokenize(text)), number=number, repeat=3)) / number
+        parsing = min(timeit.repeat(lambda: parser.parse(text), number=number, repeat=3)) / number
+
+        print(f"{name:<20} tokens={token_count:<7} lex: {lexing * 1e3:8.2f}ms "
+              f"({token_count / lexing / 1e6:5.2f}M tokens/s)  parse: {parsing * 1e3:8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
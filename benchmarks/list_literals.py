@@ -0,0 +1,55 @@
+"""
+Measures how long parsing large list literals and long argument lists takes, e.g. `code in ["A001", "A002", ...]`
+with tens of thousands of codes pasted in. It should grow linearly with the number of items.
+
+Run it from the repository root using: `PYTHONPATH=src python benchmarks/list_literals.py`
+"""
+
+import time
+
+from typing import Callable, List, Tuple
+
+from kharazmi import EquationParser
+
+
+def codes(count: int) -> str:
+    return "code in [" + ", ".join(f'"A{i:06}"' for i in range(count)) + "]"
+
+
+def numbers(count: int) -> str:
+    return "code in [" + ", ".join(str(i) for i in range(count)) + "]"
+
+
+def variables(count: int) -> str:
+    return "x in [" + ", ".join(f"field_{i}" for i in range(count)) + "]"
+
+
+def arguments(count: int) -> str:
+    return "max(" + ", ".join(f"x * {i}" for i in range(count)) + ")"
+
+
+CASES: List[Tuple[str, Callable[[int], str]]] = [
+    ("text codes", codes),
+    ("number codes", numbers),
+    ("variables", variables),
+    ("function arguments", arguments),
+]
+
+
+def main() -> None:
+    for backend in ["lalr", "pratt"]:
+        parser = EquationParser(list_factory=list, backend=backend)
+
+        for name, build in CASES:
+            for count in [10_000, 100_000]:
+                formula = build(count)
+                start = time.perf_counter()
+                expression = parser.parse(formula)
+                elapsed = time.perf_counter() - start
+
+                assert expression is not None and expression.node_count > count
+                print(f"{backend:<6} {name:<20} {count:>7} items {elapsed * 1e3:10.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
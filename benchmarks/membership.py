@@ -0,0 +1,42 @@
+"""
+Measures `IN` against large allow-lists: a list literal of constants, and a list passed in through a variable,
+with and without `compile`'s list cache.
+
+Run it from the repository root using: `PYTHONPATH=src python benchmarks/membership.py`
+"""
+
+import timeit
+
+from kharazmi import EquationParser
+
+
+SIZES = [10, 1_000, 10_000]
+
+
+def main() -> None:
+    parser = EquationParser(list_factory=list)
+
+    for size in SIZES:
+        codes = [f"A{i:06}" for i in range(size)]
+        literal = parser.parse("code in [" + ", ".join(f'"{code}"' for code in codes) + "]")
+        variable = parser.parse("code in codes")
+        assert literal is not None and variable is not None
+
+        # The last code, so scanning the list has to go through all of it.
+        values = {"code": codes[-1], "codes": codes}
+        cases = [
+            ("literal, evaluate", literal.evaluate),
+            ("literal, compile", literal.compile()),
+            ("variable, compile", variable.compile()),
+            ("variable, list cache", variable.compile(list_cache_size=8)),
+        ]
+
+        for name, evaluate in cases:
+            assert evaluate(**values) is True
+            number = max(10, 100_000 // size)
+            elapsed = min(timeit.repeat(lambda: evaluate(**values), number=number, repeat=3)) / number
+            print(f"{size:>6} items  {name:<22} {elapsed * 1e6:10.2f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Compares evaluating an expression calling an expensive function on records which repeat a few distinct arguments,
+with the function registered as pure, so its results are cached, and without.
+
+Also checks that numpy arrays, which can't be hashed, are passed to pure functions without being cached.
+
+Run it from the repository root using: `PYTHONPATH=src python benchmarks/memoization.py`
+"""
+
+import random
+import timeit
+
+import numpy as np
+
+from kharazmi import EquationParser, FunctionRegistry
+from kharazmi.columnar import vectorize
+
+
+RECORDS = 20_000
+DISTINCT = 50
+
+
+def tariff(zone):
+    # Stands for a slow lookup, e.g: walking a table of brackets.
+    return sum((zone * i) % 7 for i in range(200)) / 100
+
+
+def main() -> None:
+    random.seed(0)
+    records = [{"zone": random.randrange(DISTINCT), "weight": random.random() * 10} for _ in range(RECORDS)]
+
+    plain = FunctionRegistry({"tariff": tariff})
+    pure = FunctionRegistry()
+    pure.register("tariff", tariff, pure=True, cache_size=256)
+    assert plain.cache_info("tariff") is None
+
+    results = {}
+
+    for name, registry in [("plain", plain), ("pure", pure)]:
+        parser = EquationParser(list_factory=list, functions=registry)
+        expression = parser.parse("weight * tariff(zone) + tariff(zone + 1)")
+        assert expression is not None
+
+        compiled = expression.compile()
+        results[name] = [compiled(**record) for record in records]
+        elapsed = min(timeit.repeat(lambda: [compiled(**record) for record in records], number=1, repeat=5))
+        print(f"{name:<6} {RECORDS / elapsed:10.0f} records/s")
+
+    assert results["plain"] == results["pure"]
+
+    info = pure.cache_info("tariff")
+    assert info is not None and info.size == DISTINCT + 1 and info.evictions == 0
+    print(f"pure   {info}, hit rate {info.hits / (info.hits + info.misses):.2%}")
+
+    # `1` and `1.0` are cached apart, so the result keeps the type the function returns for each of them.
+    pure.register("half", lambda x: x // 2, pure=True)
+    assert pure.resolve("half")(3) == 1 and isinstance(pure.resolve("half")(3.0), float)
+
+    # Columns are numpy arrays, which are unhashable, so they bypass the cache.
+    pure.register("square", np.square, pure=True)
+    parser = EquationParser(list_factory=list, functions=pure)
+    vectorized = vectorize(parser.parse("square(x)"))
+    assert vectorized({"x": [1, 2, 3]}).tolist() == [1, 4, 9]
+    assert vectorized({"x": [1, 2, 3]}).tolist() == [1, 4, 9]
+    info = pure.cache_info("square")
+    assert info is not None and info.hits == info.misses == info.size == 0
+
+    try:
+        pure.register("tariff", tariff, cache_size=16)
+        raise AssertionError("Caching results of a function that isn't pure should fail.")
+    except ValueError as e:
+        print(f"caching an impure function: {e}")
+
+
+if __name__ == "__main__":
+    main()
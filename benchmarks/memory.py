@@ -0,0 +1,87 @@
+"""
+Measures how much memory parsed expressions take, in bytes per node, on a corpus of generated formulas
+which look like the ones users write: arithmetic on a few dozen fields, comparisons, IF, IN and function calls.
+
+Run it from the repository root using: `PYTHONPATH=src python benchmarks/memory.py`
+"""
+
+import gc
+import random
+import tracemalloc
+
+from typing import List
+
+from kharazmi import EquationParser
+
+
+FIELDS = [
+    "revenue", "cost", "tax_rate", "discount", "quantity", "unit_price", "margin", "region", "tier", "age",
+    "score", "balance", "limit", "fee", "bonus", "target", "weight", "height", "days", "rate",
+]
+FUNCTIONS = ["min", "max", "abs", "round", "sqrt", "log"]
+TEXTS = ['"gold"', '"silver"', '"bronze"', '"eu"', '"us"', '"apac"']
+
+
+def random_arithmetic(depth: int) -> str:
+    if depth == 0 or random.random() < 0.3:
+        return random.choice(FIELDS) if random.random() < 0.7 else str(random.choice([0, 1, 2, 10, 100, 0.5, 0.15]))
+
+    choice = random.random()
+
+    if choice < 0.15:
+        arguments = ", ".join(random_arithmetic(depth - 1) for _ in range(random.randint(1, 3)))
+        return f"{random.choice(FUNCTIONS)}({arguments})"
+
+    if choice < 0.25:
+        return f"({random_arithmetic(depth - 1)})"
+
+    operator = random.choice(["+", "-", "*", "/"])
+    return f"{random_arithmetic(depth - 1)} {operator} {random_arithmetic(depth - 1)}"
+
+
+def random_condition() -> str:
+    if random.random() < 0.3:
+        items = ", ".join(random.sample(TEXTS, random.randint(1, 3)))
+        return f"{random.choice(['region', 'tier'])} in [{items}]"
+
+    comparison = random.choice([">", "<", ">=", "<=", "==", "!="])
+    return f"{random_arithmetic(2)} {comparison} {random_arithmetic(1)}"
+
+
+def random_formula() -> str:
+    if random.random() < 0.4:
+        return f"if {random_condition()} then {random_arithmetic(3)} else {random_arithmetic(3)}."
+
+    return random_arithmetic(4)
+
+
+def main() -> None:
+    random.seed(0)
+    corpus = [random_formula() for _ in range(20_000)]
+
+    parser = EquationParser(list_factory=list)
+
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+
+    expressions = [parser.parse(formula) for formula in corpus]
+
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    nodes = 0
+    stack: List[object] = list(expressions)
+
+    while stack:
+        node = stack.pop()
+        nodes += 1
+        stack.extend(getattr(node, "_children"))
+
+    print(f"formulas={len(expressions)} nodes={nodes} total={(after - before) / 2 ** 20:.2f}MiB "
+          f"bytes/node={(after - before) / nodes:.1f}")
+
+
+if __name__ == "__main__":
+    main()
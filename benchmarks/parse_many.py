@@ -0,0 +1,51 @@
+"""
+Measures `EquationParser.parse_many` on a corpus of generated formulas, a few of them invalid, against parsing them
+one by one, for an increasing number of worker processes.
+
+Run it from the repository root using: `PYTHONPATH=src python benchmarks/parse_many.py`
+"""
+
+import os
+import random
+import time
+
+from kharazmi import EquationParser
+from kharazmi.exceptions import ParseError
+
+from memory import random_formula
+
+
+def main() -> None:
+    random.seed(0)
+    corpus = [random_formula() for _ in range(20_000)]
+    corpus[::100] = ["1 + (x"] * len(corpus[::100])
+
+    parser = EquationParser(list_factory=list)
+
+    start = time.perf_counter()
+    expected = []
+
+    for formula in corpus:
+        try:
+            expected.append(repr(parser.parse(formula)))
+        except ParseError as e:
+            expected.append(str(e))
+
+    sequential = time.perf_counter() - start
+    print(f"sequential parse          {sequential * 1e3:9.0f}ms")
+
+    cpus = os.cpu_count() or 1
+
+    for workers in sorted({1, 2, 4, cpus}):
+        start = time.perf_counter()
+        results = parser.parse_many(corpus, workers=workers)
+        elapsed = time.perf_counter() - start
+
+        assert [str(result) if isinstance(result, ParseError) else repr(result) for result in results] == expected
+        print(f"parse_many, {workers:>2} workers    {elapsed * 1e3:9.0f}ms  speedup: {sequential / elapsed:5.2f}x")
+
+    print(f"({cpus} CPUs available)")
+
+
+if __name__ == "__main__":
+    main()
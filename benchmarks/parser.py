@@ -0,0 +1,29 @@
+"""
+Compares how many formulas per second the "lalr" and "pratt" parser backends parse. Both of them are checked to build
+the same expressions, and fail with the same errors, by `tests/test_parser.py`.
+
+Run it from the repository root using: `PYTHONPATH=src python benchmarks/parser.py`
+"""
+
+import random
+import timeit
+
+from kharazmi import EquationParser
+
+from memory import random_formula
+
+
+def main() -> None:
+    lalr = EquationParser(list_factory=list)
+    pratt = EquationParser(list_factory=list, backend="pratt")
+
+    random.seed(0)
+    formulas = [random_formula() for _ in range(5_000)]
+
+    for name, parser in [("lalr", lalr), ("pratt", pratt)]:
+        elapsed = min(timeit.repeat(lambda: [parser.parse(formula) for formula in formulas], number=1, repeat=5))
+        print(f"{name:<6} {len(formulas) / elapsed:10.0f} formulas/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Compares evaluating an expression over large columns in a single process using the columnar engine, against spreading
+its partitions over several processes, which share the columns through shared memory.
+
+Run it from the repository root using: `PYTHONPATH=src python benchmarks/partitioned.py`
+"""
+
+import os
+import timeit
+
+import numpy as np
+
+from kharazmi import EquationParser, register_function
+from kharazmi.columnar import vectorize
+from kharazmi.exceptions import RowEvaluationError
+from kharazmi.partitioned import evaluate_partitioned
+
+
+EXPRESSION = 'if x > 0.5 then 2*x + y ^ 2 else -y. + (c in [1, 3, 5]) * sqrt(x)'
+ROWS = 5_000_000
+
+
+def checked_sqrt(values: np.ndarray) -> np.ndarray:
+    if np.any(values < 0):
+        raise ValueError("sqrt of a negative number")
+
+    return np.sqrt(values)
+
+
+def main() -> None:
+    register_function("sqrt", checked_sqrt)
+
+    parser = EquationParser(list_factory=list)
+    expression = parser.parse(EXPRESSION)
+    assert expression is not None
+
+    generator = np.random.default_rng(0)
+    columns = {"x": generator.random(ROWS), "y": generator.random(ROWS), "c": generator.integers(0, 8, ROWS)}
+
+    vectorized = vectorize(expression)
+    expected = vectorized(columns)
+    single_time = min(timeit.repeat(lambda: vectorized(columns), number=1, repeat=3))
+    print(f"rows={ROWS} single process: {single_time * 1e3:9.2f}ms")
+
+    for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+        assert np.array_equal(evaluate_partitioned(expression, columns, workers=workers), expected)
+        elapsed = min(timeit.repeat(lambda: evaluate_partitioned(expression, columns, workers=workers), number=1,
+                                    repeat=3))
+        print(f"rows={ROWS} workers={workers:<3} {elapsed * 1e3:9.2f}ms  speedup: {single_time / elapsed:5.2f}x")
+
+    columns["x"][ROWS - 12_345] = -1.0
+
+    try:
+        evaluate_partitioned(expression, columns, workers=2)
+        raise AssertionError("The negative value should have failed.")
+    except RowEvaluationError as e:
+        assert e.row == ROWS - 12_345, e.row
+        print(e)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Compares the peak memory use, and the time, of evaluating expressions on each row of a CSV file by loading all of its
+rows into a list of dicts first, against streaming it through `kharazmi.pipeline`.
+
+Streaming should use about the same memory whatever the number of rows is.
+
+Run it from the repository root using: `PYTHONPATH=src python benchmarks/pipeline.py`
+"""
+
+import csv
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from typing import Any, Callable, List, Tuple
+
+from kharazmi import EquationParser
+from kharazmi.pipeline import evaluate_file, parse_value
+
+
+EXPRESSIONS = ["quantity * unit_price * (1 - discount)", 'if region in ["eu", "us"] then quantity else 0.']
+UNUSED_COLUMNS = [f"note_{i}" for i in range(10)]
+
+
+def write_csv(path: str, rows: int) -> None:
+    random.seed(0)
+
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["quantity", "unit_price", "discount", "region", *UNUSED_COLUMNS])
+
+        for _ in range(rows):
+            writer.writerow([random.randint(1, 100), round(random.random() * 50, 2), random.choice([0, 0.1, 0.25]),
+                             random.choice(["eu", "us", "apac"]), *(["some text nobody reads"] * len(UNUSED_COLUMNS))])
+
+
+def measure(function: Callable[[], Any]) -> Tuple[Any, float, int]:
+    # Tracing allocations slows everything down, so the time is measured on another run.
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    result = function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main() -> None:
+    parser = EquationParser(list_factory=list)
+    expressions = [parser.parse(text) for text in EXPRESSIONS]
+
+    def load_then_evaluate(path: str) -> float:
+        with open(path, newline="") as f:
+            rows = [{name: parse_value(value) for name, value in row.items()} for row in csv.DictReader(f)]
+
+        total = 0.0
+
+        for row in rows:
+            total += sum(expression.evaluate(**row) for expression in expressions)
+
+        return total
+
+    def stream(path: str) -> float:
+        return sum(sum(results) for results in evaluate_file(expressions, path))
+
+    with tempfile.TemporaryDirectory() as directory:
+        peaks: List[int] = []
+
+        for rows in (50_000, 200_000):
+            path = os.path.join(directory, f"{rows}.csv")
+            write_csv(path, rows)
+
+            expected, load_time, load_peak = measure(lambda: load_then_evaluate(path))
+            total, stream_time, stream_peak = measure(lambda: stream(path))
+            assert abs(total - expected) < 1e-6 * abs(expected)
+            peaks.append(stream_peak)
+
+            print(f"rows={rows:<8} ({os.path.getsize(path) / 2 ** 20:6.1f}MiB) "
+                  f"load then evaluate: {load_time * 1e3:8.0f}ms peak {load_peak / 2 ** 20:8.2f}MiB  "
+                  f"streaming: {stream_time * 1e3:8.0f}ms peak {stream_peak / 2 ** 20:8.2f}MiB")
+
+        # The peak of the larger file shouldn't be much more than the smaller one's.
+        assert peaks[1] < peaks[0] * 1.5, peaks
+
+
+if __name__ == "__main__":
+    main()
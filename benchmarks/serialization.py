@@ -0,0 +1,37 @@
+"""
+Compares loading a corpus of serialized formulas against parsing them again. The round trip of each node type is
+checked by `tests/test_serialization.py`.
+
+Run it from the repository root using: `PYTHONPATH=src python benchmarks/serialization.py`
+"""
+
+import random
+import timeit
+
+from memory import random_formula
+
+from kharazmi import EquationParser
+from kharazmi.serialization import dumps, loads
+
+
+def main() -> None:
+    parser = EquationParser(list_factory=list)
+
+    random.seed(0)
+    corpus = [random_formula() for _ in range(5_000)]
+    expressions = [parser.parse(formula) for formula in corpus]
+    serialized = [dumps(expression) for expression in expressions if expression is not None]
+
+    for expression, data in zip(expressions, serialized):
+        assert repr(loads(data, list_factory=list)) == repr(expression)
+
+    parse_time = min(timeit.repeat(lambda: [parser.parse(formula) for formula in corpus], number=1, repeat=3))
+    load_time = min(timeit.repeat(lambda: [loads(data, list_factory=list) for data in serialized], number=1, repeat=3))
+
+    print(f"formulas={len(corpus)} text={sum(map(len, corpus)) / len(corpus):.1f}B/formula "
+          f"serialized={sum(map(len, serialized)) / len(serialized):.1f}B/formula")
+    print(f"parse: {parse_time * 1e3:8.2f}ms  loads: {load_time * 1e3:8.2f}ms  speedup: {parse_time / load_time:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
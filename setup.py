@@ -9,7 +9,7 @@ from setuptools import setup, find_packages
 
 def run_setup():
     requirements = [
-        "sly>=0.4",
+        "sly>=0.5,<0.6",
     ]
 
     python_requirement = ">=3.6"
@@ -39,6 +39,9 @@ def run_setup():
         url="https://github.com/mmohaveri/kharazmi",
 
         install_requires=requirements,
+        extras_require={
+            'numpy': ['numpy'],
+        },
         python_requires=python_requirement,
 
         zip_safe=True,
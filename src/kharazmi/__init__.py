@@ -1,2 +1,18 @@
-from .parser import EquationParser as EquationParser
+from typing import TYPE_CHECKING, Any
+
 from .models import register_function as register_function
+from .registry import FunctionRegistry as FunctionRegistry, default_registry as default_registry
+
+if TYPE_CHECKING:
+    from .parser import EquationParser as EquationParser
+
+
+def __getattr__(name: str) -> Any:
+    # Importing the parser builds its grammar, so it's only imported once it's used.
+    if name == "EquationParser":
+        from .parser import EquationParser
+
+        globals()[name] = EquationParser
+        return EquationParser
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
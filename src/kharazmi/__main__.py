@@ -1,8 +1,81 @@
-from typing import Union
+import argparse
+import csv
+import json
+import sys
+
+from typing import Any, Dict, List, Optional, Sequence, Union, cast
+from .exceptions import KharazmiBaseError, ParseError
+from .models import BaseExpression
 from .parser import EquationParser
+from .pipeline import DEFAULT_CHUNK_SIZE, evaluate_file
+from .types import ListFactory
 
 
-def main():
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    argument_parser = build_argument_parser()
+    arguments = argument_parser.parse_args(argv)
+
+    if arguments.path is None:
+        repl()
+        return
+
+    if not arguments.expressions:
+        argument_parser.error("at least one expression is needed to evaluate a file")
+
+    parser = EquationParser(list_factory=cast(ListFactory, list))
+    expressions: List[BaseExpression] = []
+
+    for text in arguments.expressions:
+        try:
+            expression = parser.parse(text)
+        except ParseError as e:
+            argument_parser.error(f"can't parse {text!r}: {e}")
+
+        if expression is None:
+            argument_parser.error(f"can't parse {text!r}: the expression is empty")
+
+        expressions.append(expression)
+
+    try:
+        # Unknown file formats, among other errors, are raised right away, rather than once the results are read.
+        results = evaluate_file(expressions, arguments.path, arguments.format, arguments.chunk_size, arguments.lazy,
+                                arguments.columnar)
+
+        if arguments.output_format == "csv":
+            writer = csv.writer(sys.stdout)
+            writer.writerow(arguments.expressions)
+            writer.writerows(results)
+        else:
+            for result in results:
+                print(json.dumps(dict(zip(arguments.expressions, result)), default=str))
+    except (KharazmiBaseError, OSError, ValueError) as e:
+        sys.exit(f"{argument_parser.prog}: error: {e}")
+
+
+def build_argument_parser() -> argparse.ArgumentParser:
+    argument_parser = argparse.ArgumentParser(
+        prog="python -m kharazmi",
+        description="Evaluates expressions on each record of a CSV or JSON Lines file, streaming the results to the "
+                    + "standard output. Runs an interactive prompt if no file is given.",
+    )
+    argument_parser.add_argument("path", nargs="?", help="CSV or JSON Lines file to read the records from")
+    argument_parser.add_argument("-e", "--expression", dest="expressions", action="append", default=[],
+                                 metavar="EXPRESSION",
+                                 help="expression to evaluate, can be given more than once")
+    argument_parser.add_argument("--format", choices=["csv", "jsonl"],
+                                 help="format of the file, told from its extension by default")
+    argument_parser.add_argument("--output-format", choices=["csv", "jsonl"], default="csv",
+                                 help="format of the results, csv by default")
+    argument_parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                                 help=f"number of records evaluated at once, {DEFAULT_CHUNK_SIZE} by default")
+    argument_parser.add_argument("--lazy", action="store_true", help="compile the expressions with lazy=True")
+    argument_parser.add_argument("--columnar", action="store_true",
+                                 help="evaluate each chunk using the columnar engine, which needs numpy")
+
+    return argument_parser
+
+
+def repl() -> None:
     parser = EquationParser(list_factory=lambda x: list(x))
 
     while True:
@@ -18,7 +91,7 @@ def main():
 
         print(f"You can do it in code using: {repr(expression)}")
 
-        kwargs = {}
+        kwargs: Dict[str, Any] = {}
 
         for var in expression.variables:
             kwargs[var] = number_input(f"{var} = ")
@@ -0,0 +1,83 @@
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, NamedTuple, TypeVar
+
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+def constant_key(value: object) -> Hashable:
+    """
+    A key which is the same for two constants iff one can stand for the other. 1, 1.0 and True are equal, and so are
+    0.0 and -0.0, but they're not the same constant, so the key holds the type, and the `repr` of floats (and complex
+    numbers), which keeps the sign of zeros.
+    """
+
+    if type(value) is float or type(value) is complex:
+        return (type(value), repr(value))
+
+    return (type(value), value)
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    max_size: int
+    size: int
+
+
+class LRUCache(Generic[K, V]):
+    """
+    A bounded mapping which evicts the least recently used entry when it grows beyond `max_size`.
+    It keeps count of hits, misses and evictions, which can be read using `info`.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        if max_size <= 0:
+            raise ValueError("Cache size should be a positive integer.")
+
+        self._max_size = max_size
+        self._entries: "OrderedDict[K, V]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get_or_compute(self, key: K, compute: Callable[[], V]) -> V:
+        """
+        Returns the value cached for `key`, or computes, caches and returns it if there's none.
+        Nothing gets cached if `compute` raises.
+        """
+
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self._misses += 1
+        else:
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return value
+
+        value = compute()
+        self._entries[key] = value
+
+        if len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(self._hits, self._misses, self._evictions, self._max_size, len(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._entries
@@ -0,0 +1,253 @@
+import ast
+import operator
+
+from types import CodeType
+from typing import Any, Callable, Dict, List, Mapping, Set
+
+from .exceptions import CodeGenerationError
+from .models import (BaseBinaryExpression, BaseExpression, BaseTrinaryExpression, BaseUnaryExpression, Boolean,
+                     FunctionExpression, ListExpression, Number, Text, Variable, _SCALAR_TYPES)
+from .types import TypedValue
+
+
+_BINARY_OPERATORS: Mapping[Any, ast.operator] = {
+    operator.add: ast.Add(),
+    operator.sub: ast.Sub(),
+    operator.mul: ast.Mult(),
+    operator.truediv: ast.Div(),
+    operator.pow: ast.Pow(),
+}
+
+_COMPARISON_OPERATORS: Mapping[Any, ast.cmpop] = {
+    operator.eq: ast.Eq(),
+    operator.ne: ast.NotEq(),
+    operator.lt: ast.Lt(),
+    operator.le: ast.LtE(),
+    operator.gt: ast.Gt(),
+    operator.ge: ast.GtE(),
+}
+
+_UNARY_OPERATORS: Mapping[Any, ast.unaryop] = {
+    operator.neg: ast.USub(),
+}
+
+# Everything the generated code is allowed to contain. Anything else is a bug in the generator and is rejected
+# before the tree gets compiled.
+_ALLOWED_NODES = (
+    ast.Expression, ast.Lambda, ast.arguments, ast.arg, ast.Call, ast.Name, ast.Load, ast.Store, ast.Constant,
+    ast.List, ast.Tuple, ast.Subscript, ast.IfExp, ast.NamedExpr, ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare,
+    ast.In, ast.And,
+    *(type(op) for op in _BINARY_OPERATORS.values()),
+    *(type(op) for op in _COMPARISON_OPERATORS.values()),
+    *(type(op) for op in _UNARY_OPERATORS.values()),
+)
+
+
+class GeneratedExpression(object):
+    """
+    Callable built by `generate`. Calling it with values for the variables gives the same result as
+    calling `evaluate` on the expression it was generated from.
+    """
+
+    def __init__(self, tree: ast.Expression, code: CodeType, namespace: Dict[str, Any], variables: List[str]) -> None:
+        self.tree = tree
+        self.code = code
+        self._variables = variables
+        self._function: Callable[..., TypedValue] = eval(code, namespace)
+
+    def __call__(self, **variables_values: TypedValue) -> TypedValue:
+        try:
+            arguments = [variables_values[name] for name in self._variables]
+        except KeyError as e:
+            raise ValueError(f"Variable `{e.args[0]}` does not have a value!") from None
+
+        return self._function(*arguments)
+
+
+class _CodeGenerator(object):
+    """
+    Generates a lambda that takes the variables as positional arguments.
+
+    Instead of nesting the nodes' code inside each other, which makes deep expressions overflow the recursion limit
+    of python's compiler, every non-leaf node is computed into a temporary, in post-order, inside a single tuple:
+
+        lambda _v0, _v1: (_t0 := _v0 * _v1 if ..., _t1 := _t0 + 1 if ..., )[-1]
+
+    Leaves (variables and constants) are used in place, and nodes shared by more than one parent
+    (see `kharazmi.optimizer.eliminate_common_subexpressions`) are computed only once.
+    """
+
+    def __init__(self) -> None:
+        # The generated code never sees python's builtins, only what we put in its namespace.
+        self._namespace: Dict[str, Any] = {"__builtins__": {}, "_type": type, "_scalar_types": _SCALAR_TYPES}
+        self._parameters: Dict[str, str] = {}
+        self._temporaries: Set[str] = set()
+        self._steps: List[ast.expr] = []
+        self._visited: Dict[int, ast.expr] = {}
+
+    def generate(self, expression: BaseExpression) -> GeneratedExpression:
+        result = self._visit(expression)
+
+        body: ast.expr = result
+        if self._steps:
+            steps = ast.Tuple(elts=self._steps, ctx=ast.Load())
+            body = ast.Subscript(value=steps, slice=ast.Constant(value=-1), ctx=ast.Load())
+
+        lambda_arguments = ast.arguments(
+            posonlyargs=[], args=[ast.arg(arg=parameter) for parameter in self._parameters.values()],
+            kwonlyargs=[], kw_defaults=[], defaults=[],
+        )
+        tree = ast.Expression(body=ast.Lambda(args=lambda_arguments, body=body))
+
+        self._validate(tree)
+
+        code = compile(tree, "<kharazmi>", "eval")
+        return GeneratedExpression(tree, code, self._namespace, list(self._parameters.keys()))
+
+    def _validate(self, tree: ast.Expression) -> None:
+        known_names = {*self._namespace.keys(), *self._parameters.values(), *self._temporaries}
+
+        for node in ast.walk(tree):
+            if not isinstance(node, _ALLOWED_NODES):
+                raise CodeGenerationError(f"Generated code contains a forbidden node `{node.__class__.__name__}`.")
+
+            if isinstance(node, ast.Name) and node.id not in known_names:
+                raise CodeGenerationError(f"Generated code refers to an unknown name `{node.id}`.")
+
+            if "lineno" in node._attributes:
+                setattr(node, "lineno", 1)
+                setattr(node, "col_offset", 0)
+                setattr(node, "end_lineno", 1)
+                setattr(node, "end_col_offset", 0)
+
+    def _visit(self, expression: BaseExpression) -> ast.expr:
+        if id(expression) not in self._visited:
+            self._visited[id(expression)] = self._visit_node(expression)
+
+        return self._visited[id(expression)]
+
+    def _visit_node(self, expression: BaseExpression) -> ast.expr:
+        if isinstance(expression, Variable):
+            return self._load(self._parameter(expression._name))
+
+        if isinstance(expression, (Number, Text, Boolean)):
+            return ast.Constant(value=expression._value)
+
+        if isinstance(expression, FunctionExpression):
+            return self._visit_function(expression)
+
+        if isinstance(expression, ListExpression):
+            list_factory = self._register(f"_list_factory{len(self._namespace)}", expression.items._list_factory)
+            items = [self._visit(item) for item in expression.items._expressions]
+            return self._emit(self._call(list_factory, ast.List(elts=items, ctx=ast.Load())))
+
+        if isinstance(expression, BaseUnaryExpression):
+            return self._visit_unary(expression)
+
+        if isinstance(expression, BaseBinaryExpression):
+            return self._visit_binary(expression)
+
+        if isinstance(expression, BaseTrinaryExpression):
+            operand1 = self._visit(expression._operand1_expression)
+            operand2 = self._visit(expression._operand2_expression)
+            operand3 = self._visit(expression._operand3_expression)
+            return self._emit(self._call(self._apply(expression), operand1, operand2, operand3))
+
+        raise CodeGenerationError(f"Can not generate code for `{expression.__class__.__name__}`.")
+
+    def _visit_function(self, expression: FunctionExpression) -> ast.expr:
+        # Resolved once, here, so an unknown function fails to generate.
+        function = expression.registry.resolve(expression._name)
+        name = self._register(f"_function{id(function)}", function)
+        arguments = [self._visit(item) for item in expression._argument._expressions]
+        return self._emit(ast.Call(func=self._load(name), args=arguments, keywords=[]))
+
+    def _visit_unary(self, expression: BaseUnaryExpression) -> ast.expr:
+        operand = self._visit(expression._operand_expression)
+        apply = self._apply(expression)
+
+        if expression._scalar_operator not in _UNARY_OPERATORS:
+            return self._emit(self._call(apply, operand))
+
+        # -operand if type(operand) in scalar_types else apply(operand)
+        return self._emit(ast.IfExp(
+            test=self._is_scalar(operand),
+            body=ast.UnaryOp(op=_UNARY_OPERATORS[expression._scalar_operator], operand=operand),
+            orelse=self._call(apply, operand),
+        ))
+
+    def _visit_binary(self, expression: BaseBinaryExpression) -> ast.expr:
+        left_hand_side = self._visit(expression._left_hand_side_expression)
+        right_hand_side = self._visit(expression._right_hand_side_expression)
+        apply = self._apply(expression)
+        scalar_operator = expression._scalar_operator
+
+        body: ast.expr
+        if scalar_operator in _BINARY_OPERATORS:
+            body = ast.BinOp(left=left_hand_side, op=_BINARY_OPERATORS[scalar_operator], right=right_hand_side)
+        elif scalar_operator in _COMPARISON_OPERATORS:
+            body = ast.Compare(left=left_hand_side, ops=[_COMPARISON_OPERATORS[scalar_operator]],
+                               comparators=[right_hand_side])
+        else:
+            return self._emit(self._call(apply, left_hand_side, right_hand_side))
+
+        # lhs + rhs if type(lhs) in scalar_types and type(rhs) in scalar_types else apply(lhs, rhs)
+        operands = (left_hand_side, right_hand_side)
+        checks = [self._is_scalar(operand) for operand in operands if not self._is_scalar_constant(operand)]
+
+        if not checks:
+            return self._emit(body)
+
+        test = checks[0] if len(checks) == 1 else ast.BoolOp(op=ast.And(), values=checks)
+        return self._emit(ast.IfExp(test=test, body=body, orelse=self._call(apply, left_hand_side, right_hand_side)))
+
+    def _emit(self, value: ast.expr) -> ast.expr:
+        temporary = f"_t{len(self._temporaries)}"
+        self._temporaries.add(temporary)
+        self._steps.append(ast.NamedExpr(target=ast.Name(id=temporary, ctx=ast.Store()), value=value))
+        return self._load(temporary)
+
+    def _apply(self, expression: BaseExpression) -> str:
+        # `_apply` does not depend on the node's state, so one bound method per class is enough.
+        name = f"_{expression.__class__.__name__}"
+
+        if name not in self._namespace:
+            self._register(name, getattr(expression, "_apply"))
+
+        return name
+
+    def _is_scalar(self, value: ast.expr) -> ast.expr:
+        return ast.Compare(left=self._call("_type", value), ops=[ast.In()], comparators=[self._load("_scalar_types")])
+
+    @staticmethod
+    def _is_scalar_constant(value: ast.expr) -> bool:
+        return isinstance(value, ast.Constant) and type(value.value) in _SCALAR_TYPES
+
+    def _parameter(self, variable: str) -> str:
+        # Variables are renamed, so they can never clash with python keywords or our own names.
+        if variable not in self._parameters:
+            self._parameters[variable] = f"_v{len(self._parameters)}"
+
+        return self._parameters[variable]
+
+    def _register(self, name: str, value: Any) -> str:
+        self._namespace[name] = value
+        return name
+
+    def _call(self, name: str, *arguments: ast.expr) -> ast.expr:
+        return ast.Call(func=self._load(name), args=list(arguments), keywords=[])
+
+    @staticmethod
+    def _load(name: str) -> ast.expr:
+        return ast.Name(id=name, ctx=ast.Load())
+
+
+def generate(expression: BaseExpression) -> GeneratedExpression:
+    """
+    Turns an expression into a python code object and returns a callable that runs it.
+
+    The code is built from the expression's nodes, never from the text the user has entered, and runs without access
+    to python's builtins. The only functions it can call are the ones registered using `FunctionExpression.register`.
+    """
+
+    return _CodeGenerator().generate(expression)
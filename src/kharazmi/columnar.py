@@ -0,0 +1,257 @@
+"""
+A columnar engine which evaluates an expression over whole columns of data at once, using numpy's vectorized operations.
+
+It requires numpy to be installed, e.g: using `pip install kharazmi[numpy]`.
+"""
+
+from typing import Any, Callable, Dict, List, Mapping, Optional, cast
+
+import numpy as np
+import numpy.typing as npt
+
+from .exceptions import EvaluationError
+from .models import (AdditionExpression, AndExpression, BaseBinaryExpression, BaseExpression, BaseUnaryExpression,
+                     Boolean, ContainsExpression, DivisionExpression, EqualExpression, ExponentiationExpression,
+                     FunctionExpression, GreaterThanExpression, GreaterThanOrEqualExpression, IfExpression,
+                     LengthExpression, LessThanExpression, LessThanOrEqualExpression, ListExpression,
+                     MultiplicationExpression, NegativeExpression, NotContainsExpression, NotEqualExpression,
+                     NotExpression, Number, OrExpression, SubtractionExpression, Text, Variable, _count_references)
+
+
+Columns = Mapping[str, npt.ArrayLike]
+_ColumnEvaluator = Callable[[Mapping[str, np.ndarray]], Any]
+
+
+_BINARY_UFUNCS: Dict[type, np.ufunc] = {
+    AdditionExpression: np.add,
+    SubtractionExpression: np.subtract,
+    MultiplicationExpression: np.multiply,
+    DivisionExpression: np.true_divide,
+    ExponentiationExpression: np.power,
+    EqualExpression: np.equal,
+    NotEqualExpression: np.not_equal,
+    LessThanExpression: np.less,
+    LessThanOrEqualExpression: np.less_equal,
+    GreaterThanExpression: np.greater,
+    GreaterThanOrEqualExpression: np.greater_equal,
+    AndExpression: np.logical_and,
+    OrExpression: np.logical_or,
+}
+
+_UNARY_UFUNCS: Dict[type, np.ufunc] = {
+    NegativeExpression: np.negative,
+    NotExpression: np.logical_not,
+}
+
+
+class VectorizedExpression(object):
+    """
+    Callable built by `vectorize`. It takes a mapping of variable names to 1-D arrays (or anything numpy can turn
+    into one) and returns a 1-D array holding the value of the expression for each row.
+    """
+
+    def __init__(self, evaluator: _ColumnEvaluator, variables: List[str]) -> None:
+        self._evaluator = evaluator
+        self._variables = variables
+
+    def __call__(self, columns: Columns) -> np.ndarray:
+        arrays: Dict[str, np.ndarray] = {}
+
+        for name in self._variables:
+            if name not in columns:
+                raise ValueError(f"Variable `{name}` does not have a value!")
+
+            arrays[name] = np.asarray(columns[name])
+
+        result = np.asarray(self._evaluator(arrays))
+
+        # Constant (sub)expressions evaluate to scalars, which get broadcast to the number of rows.
+        if arrays and result.ndim == 0:
+            length = len(next(iter(arrays.values())))
+            result = np.broadcast_to(result, (length,))
+
+        return result
+
+
+def vectorize(expression: BaseExpression) -> VectorizedExpression:
+    """
+    Compiles an expression into a columnar evaluator.
+
+    Operators are mapped to numpy ufuncs, IF to `np.where`, IN and NOT IN to `np.isin`, and LENGTH OF to a vectorized
+    string length. Registered functions are called once, with whole columns, so they should accept numpy arrays.
+    """
+
+    return VectorizedExpression(_Compiler(expression).compile(expression), sorted(expression.variables))
+
+
+def evaluate_columns(expression: BaseExpression, columns: Columns) -> np.ndarray:
+    return vectorize(expression)(columns)
+
+
+class _Compiler(object):
+    """
+    Nodes shared by more than one parent (see `kharazmi.optimizer.eliminate_common_subexpressions`) are compiled
+    once, and their value is computed once per evaluation. It gets stored in the columns mapping, which is built
+    for each evaluation, under an integer key, so duplicate temporary arrays are not computed again.
+    """
+
+    def __init__(self, root: BaseExpression) -> None:
+        self._references = _count_references(root)
+        self._compiled: Dict[int, _ColumnEvaluator] = {}
+
+    def compile(self, expression: BaseExpression) -> _ColumnEvaluator:
+        key = id(expression)
+
+        if key in self._compiled:
+            return self._compiled[key]
+
+        evaluator = self._compile(expression)
+
+        if self._references[key] > 1 and expression._children:
+            evaluator = self._shared(evaluator, len(self._compiled))
+
+        self._compiled[key] = evaluator
+        return evaluator
+
+    @staticmethod
+    def _shared(evaluator: _ColumnEvaluator, slot: int) -> _ColumnEvaluator:
+        def shared_evaluator(columns: Mapping[str, np.ndarray]) -> Any:
+            scope = cast(Dict[Any, Any], columns)
+
+            if slot not in scope:
+                scope[slot] = evaluator(columns)
+
+            return scope[slot]
+
+        return shared_evaluator
+
+    def _compile(self, expression: BaseExpression) -> _ColumnEvaluator:
+        if isinstance(expression, Variable):
+            name = expression._name
+            return lambda columns: columns[name]
+
+        if isinstance(expression, (Number, Text, Boolean)):
+            value: Any = expression._value
+            return lambda _: value
+
+        if isinstance(expression, ListExpression):
+            return self._compile_list(expression)
+
+        if isinstance(expression, FunctionExpression):
+            return self._compile_function(expression)
+
+        if isinstance(expression, IfExpression):
+            condition = self.compile(expression._operand1_expression)
+            choice1 = self.compile(expression._operand2_expression)
+            choice2 = self.compile(expression._operand3_expression)
+
+            def if_evaluator(columns: Mapping[str, np.ndarray]) -> np.ndarray:
+                return cast(np.ndarray, np.where(condition(columns), choice1(columns), choice2(columns)))
+
+            return if_evaluator
+
+        if isinstance(expression, (ContainsExpression, NotContainsExpression)):
+            return self._compile_contains(expression)
+
+        if isinstance(expression, LengthExpression):
+            return self._compile_length(expression)
+
+        if isinstance(expression, BaseUnaryExpression) and type(expression) in _UNARY_UFUNCS:
+            unary_ufunc = _UNARY_UFUNCS[type(expression)]
+            operand = self.compile(expression._operand_expression)
+            return lambda columns: unary_ufunc(operand(columns))
+
+        if isinstance(expression, BaseBinaryExpression) and type(expression) in _BINARY_UFUNCS:
+            binary_ufunc = _BINARY_UFUNCS[type(expression)]
+            left_hand_side = self.compile(expression._left_hand_side_expression)
+            right_hand_side = self.compile(expression._right_hand_side_expression)
+            return lambda columns: binary_ufunc(left_hand_side(columns), right_hand_side(columns))
+
+        raise EvaluationError(f"`{expression.__class__.__name__}` is not supported by the columnar engine.")
+
+    def _compile_list(self, expression: ListExpression) -> _ColumnEvaluator:
+        """
+        A list literal evaluates to an array whose last axis holds the list's items, one row per input row
+        if any of the items depends on a variable.
+        """
+
+        items = [self.compile(item) for item in expression.items._expressions]
+
+        def evaluator(columns: Mapping[str, np.ndarray]) -> np.ndarray:
+            return np.stack(np.broadcast_arrays(*[item(columns) for item in items]), axis=-1)
+
+        return evaluator
+
+    def _compile_contains(self, expression: BaseBinaryExpression) -> _ColumnEvaluator:
+        invert = isinstance(expression, NotContainsExpression)
+        left_hand_side = self.compile(expression._left_hand_side_expression)
+        right_hand_side_expression = expression._right_hand_side_expression
+
+        if not isinstance(right_hand_side_expression, ListExpression):
+            raise EvaluationError("The columnar engine only supports IN and NOT IN against list literals.")
+
+        constant_items = _constant_items(right_hand_side_expression)
+
+        if constant_items is not None and _same_kind(constant_items):
+            # A list of constants is the same for all the rows, so it can be looked up using hashing/sorting.
+            return lambda columns: np.isin(left_hand_side(columns), constant_items, invert=invert)
+
+        if constant_items is not None:
+            # numpy would turn a list of numbers and strings into an array of strings, which no number is equal to,
+            # so the values are compared with each of the items instead.
+            def mixed_evaluator(columns: Mapping[str, np.ndarray]) -> np.ndarray:
+                values = left_hand_side(columns)
+                contains = np.zeros(np.shape(values), dtype=bool)
+
+                for item in constant_items:
+                    contains |= values == item
+
+                return np.logical_not(contains) if invert else contains
+
+            return mixed_evaluator
+
+        right_hand_side = self.compile(right_hand_side_expression)
+
+        def evaluator(columns: Mapping[str, np.ndarray]) -> np.ndarray:
+            contains = np.any(np.expand_dims(left_hand_side(columns), -1) == right_hand_side(columns), axis=-1)
+            return np.logical_not(contains) if invert else contains
+
+        return evaluator
+
+    def _compile_length(self, expression: LengthExpression) -> _ColumnEvaluator:
+        operand_expression = expression._operand_expression
+
+        if isinstance(operand_expression, ListExpression):
+            length = len(operand_expression.items._expressions)
+            return lambda _: length
+
+        operand = self.compile(operand_expression)
+        return lambda columns: np.char.str_len(operand(columns))
+
+    def _compile_function(self, expression: FunctionExpression) -> _ColumnEvaluator:
+        # Resolved once, here, so an unknown function fails to vectorize.
+        function = expression.registry.resolve(expression._name)
+        arguments = [self.compile(item) for item in expression._argument._expressions]
+
+        def evaluator(columns: Mapping[str, np.ndarray]) -> Any:
+            return function(*[argument(columns) for argument in arguments])
+
+        return evaluator
+
+
+def _constant_items(expression: ListExpression) -> Optional[List[Any]]:
+    items = expression.items._expressions
+
+    if not all(isinstance(item, (Number, Text, Boolean)) for item in items):
+        return None
+
+    return [getattr(item, "_value") for item in items]
+
+
+def _same_kind(items: List[Any]) -> bool:
+    """
+    Whether the items are all numbers (including booleans) or all strings, which numpy holds without converting them.
+    """
+
+    strings = sum(isinstance(item, str) for item in items)
+    return strings == 0 or strings == len(items)
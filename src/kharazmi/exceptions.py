@@ -16,3 +16,19 @@ class EvaluationError(KharazmiBaseError):
 class LexError(ParseError):
     def __init__(self, message: str = "") -> None:
         super().__init__(message)
+
+
+class CodeGenerationError(KharazmiBaseError):
+    def __init__(self, message: str = "") -> None:
+        super().__init__(message)
+
+
+class SerializationError(KharazmiBaseError):
+    def __init__(self, message: str = "") -> None:
+        super().__init__(message)
+
+
+class RowEvaluationError(EvaluationError):
+    def __init__(self, message: str = "", row: int = -1) -> None:
+        super().__init__(message)
+        self.row = row
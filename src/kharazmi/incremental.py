@@ -0,0 +1,118 @@
+"""
+Evaluates an expression over and over again, while only some of its variables change between evaluations, e.g: in an
+interactive tool where users change one input at a time.
+
+The value of each node is kept once it's computed, and changing a variable only drops the values of the nodes whose
+`variables` hold it, i.e. the paths from that variable up to the root, so updating an expression made of many
+independent terms costs as much as evaluating the terms which changed.
+"""
+
+from typing import Dict, FrozenSet, List, Mapping, Optional
+
+from .cache import constant_key
+from .models import BaseExpression, CompilationContext, FunctionExpression
+from .registry import FunctionRegistry
+from .types import Evaluator, TypedValue
+
+
+# Values of these types can't be modified in place, so a variable given the same constant (see `constant_key`, which
+# tells 0.0 and -0.0 apart) is unchanged. Values of other types, e.g: lists or numpy arrays, are taken as changed
+# whenever they're given.
+_IMMUTABLE_TYPES: FrozenSet[type] = frozenset({int, float, complex, bool, str})
+
+
+class IncrementalEvaluator(object):
+    """
+    Evaluates an expression, keeping the values of its nodes, and computes only the nodes depending on the variables
+    given to `update` again.
+
+    Nodes which don't depend on any variable are computed once, and so are function calls whose arguments don't
+    change, so functions are assumed to be pure. `lazy`, `list_cache_size` and `functions` have the same meaning as in
+    `BaseExpression.compile`.
+    """
+
+    def __init__(self, expression: BaseExpression, lazy: bool = False, list_cache_size: Optional[int] = None,
+                 functions: Optional[FunctionRegistry] = None) -> None:
+        context = _IncrementalCompilationContext(expression, lazy, list_cache_size, functions)
+
+        self._evaluator = context.compile(expression)
+        self._node_values = context.node_values
+        self._dependents = context.dependents
+        self._variables_values: Dict[str, TypedValue] = {}
+
+    @ property
+    def variables_values(self) -> Mapping[str, TypedValue]:
+        """
+        The values given to the variables so far.
+        """
+
+        return self._variables_values
+
+    def update(self, **variables_values: TypedValue) -> TypedValue:
+        """
+        Changes the values of the given variables, keeping the values of the others, and returns the new value of the
+        expression. The first update has to give a value to all of the variables.
+        """
+
+        current_values = self._variables_values
+        node_values = self._node_values
+
+        for name, value in variables_values.items():
+            if name in current_values and _unchanged(current_values[name], value):
+                continue
+
+            current_values[name] = value
+
+            for key in self._dependents.get(name, ()):
+                node_values.pop(key, None)
+
+        return self._evaluator(current_values)
+
+
+class _IncrementalCompilationContext(CompilationContext):
+    """
+    Compiles each node, other than variables and constants, to keep its value in `node_values`, by its id, and to
+    return it as long as it's there. Ids of the nodes depending on each variable are kept in `dependents`.
+
+    Every node keeps its own value, so nodes reachable through more than one path don't need to be stored in the
+    variables mapping, as `CompilationContext` does, which would keep them there across updates.
+    """
+
+    def __init__(self, root: BaseExpression, lazy: bool = False, list_cache_size: Optional[int] = None,
+                 functions: Optional[FunctionRegistry] = None) -> None:
+        super().__init__(root, lazy, list_cache_size, functions)
+        self.node_values: Dict[int, TypedValue] = {}
+        self.dependents: Dict[str, List[int]] = {}
+
+    def compile(self, expression: BaseExpression) -> Evaluator:
+        key = id(expression)
+
+        if key in self._evaluators:
+            return self._evaluators[key]
+
+        evaluator = expression._compile(self)
+
+        if expression._children or isinstance(expression, FunctionExpression):
+            evaluator = self._kept(evaluator, key)
+
+            for name in expression.variables:
+                self.dependents.setdefault(name, []).append(key)
+
+        self._evaluators[key] = evaluator
+        return evaluator
+
+    def _kept(self, evaluator: Evaluator, key: int) -> Evaluator:
+        node_values = self.node_values
+
+        def kept_evaluator(variables_values: Mapping[str, TypedValue]) -> TypedValue:
+            if key in node_values:
+                return node_values[key]
+
+            value = node_values[key] = evaluator(variables_values)
+            return value
+
+        return kept_evaluator
+
+
+def _unchanged(value: TypedValue, new_value: TypedValue) -> bool:
+    return type(value) in _IMMUTABLE_TYPES and constant_key(new_value) == constant_key(value)
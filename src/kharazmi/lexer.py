@@ -1,91 +1,204 @@
-from typing import Set
-from sly import Lexer
-from sly.lex import Token
+import re
 
+from typing import Any, Dict, FrozenSet, Iterator, NoReturn, Set, Tuple, Union, cast
 
 from .exceptions import LexError
 
 
-class EquationLexer(Lexer):
+# Keywords spelled as a single word. Anything else matching an identifier is one, so keywords are only recognized as
+# whole words, e.g. `island` is an identifier rather than `is` followed by `land`.
+_KEYWORDS: Dict[str, str] = {
+    "and": "AND", "AND": "AND",
+    "or": "OR", "OR": "OR",
+    "not": "NOT", "NOT": "NOT",
+    "is": "EQUAL", "IS": "EQUAL",
+    "true": "TRUE", "TRUE": "TRUE", "True": "TRUE",
+    "false": "FALSE", "FALSE": "FALSE", "False": "FALSE",
+    "if": "IF", "IF": "IF",
+    "then": "THEN", "THEN": "THEN",
+    "else": "ELSE", "ELSE": "ELSE",
+    "in": "IN", "IN": "IN",
+}
+
+# Keywords spelled as several words separated by a single space, by their first word. Longer ones come first, so
+# `is greater than or equal` isn't read as `is greater than` followed by `or`.
+_PHRASES: Dict[str, Tuple[Tuple[str, str], ...]] = {
+    "is": (
+        (" greater than or equal", "GREATER_THAN_OR_EQUAL"),
+        (" greater than", "GREATER_THAN"),
+        (" less than or equal", "LESS_THAN_OR_EQUAL"),
+        (" less than", "LESS_THAN"),
+        (" not", "NOT_EQUAL"),
+    ),
+    "IS": (
+        (" GREATER THAN OR EQUAL", "GREATER_THAN_OR_EQUAL"),
+        (" GREATER THAN", "GREATER_THAN"),
+        (" LESS THAN OR EQUAL", "LESS_THAN_OR_EQUAL"),
+        (" LESS THAN", "LESS_THAN"),
+        (" NOT", "NOT_EQUAL"),
+    ),
+    "not": ((" in", "NOT_IN"),),
+    "NOT": ((" IN", "NOT_IN"),),
+    "length": ((" of", "LENGTH_OF"),),
+    "LENGTH": ((" OF", "LENGTH_OF"),),
+}
+
+_OPERATORS: Dict[str, str] = {
+    "+": "PLUS",
+    "-": "MINUS",
+    "*": "TIMES",
+    "/": "DIVIDE",
+    "^": "POWER",
+    ">": "GREATER_THAN",
+    "<": "LESS_THAN",
+    "!": "NOT",
+    "(": "(",
+    ")": ")",
+    ",": ",",
+    ".": ".",
+    "[": "[",
+    "]": "]",
+}
+
+_TWO_CHARACTER_OPERATORS: Dict[str, str] = {
+    ">=": "GREATER_THAN_OR_EQUAL",
+    "<=": "LESS_THAN_OR_EQUAL",
+    "!=": "NOT_EQUAL",
+    "==": "EQUAL",
+    "&&": "AND",
+    "||": "OR",
+}
+
+_IGNORED: FrozenSet[str] = frozenset(" \t")
+_DIGITS: FrozenSet[str] = frozenset("0123456789")
+_IDENTIFIER_START: FrozenSet[str] = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_")
+_IDENTIFIER_CHARACTERS: FrozenSet[str] = _IDENTIFIER_START | _DIGITS
+
+_IDENTIFIER = re.compile(r"[a-zA-Z_][a-zA-Z_0-9]*")
+_NUMBER = re.compile(r"\d+(?:\.\d+)?(?:[+\-]\d+(?:\.\d*)?j)?")
+
+
+class Token(object):
+    """
+    A token read by `EquationLexer`. `index` is the position of its first character in the input.
+    """
+
+    __slots__ = ("type", "value", "index")
+
+    def __init__(self, type: str, value: Any, index: int) -> None:
+        self.type = type
+        self.value = value
+        self.index = index
+
+    def __repr__(self) -> str:
+        return f"Token(type={self.type!r}, value={self.value!r}, index={self.index})"
+
+
+class EquationLexer(object):
+    """
+    A single pass scanner for the tokens of `EquationParser`'s grammar. It looks at the first character of each token
+    to tell what it may be, reads identifiers as a whole and then looks them up in the keyword tables.
+
+    `tokenize` yields the tokens as it reads them, so the parser doesn't wait for the whole input to be read, and an
+    invalid character raises `LexError` once it's reached.
+    """
+
     tokens: Set[str] = {
-        NUMBER,
-        IDENTIFIER,
-        PLUS,
-        MINUS,
-        TIMES,
-        DIVIDE,
-        POWER,
-        EQUAL,
-        NOT_EQUAL,
-        GREATER_THAN,
-        LESS_THAN,
-        GREATER_THAN_OR_EQUAL,
-        LESS_THAN_OR_EQUAL,
-        AND,
-        OR,
-        NOT,
-        TRUE,
-        FALSE,
-        IF,
-        THEN,
-        ELSE,
-        TEXT,
-        LENGTH_OF,
-        IN,
-        NOT_IN,
+        "NUMBER",
+        "IDENTIFIER",
+        "PLUS",
+        "MINUS",
+        "TIMES",
+        "DIVIDE",
+        "POWER",
+        "EQUAL",
+        "NOT_EQUAL",
+        "GREATER_THAN",
+        "LESS_THAN",
+        "GREATER_THAN_OR_EQUAL",
+        "LESS_THAN_OR_EQUAL",
+        "AND",
+        "OR",
+        "NOT",
+        "TRUE",
+        "FALSE",
+        "IF",
+        "THEN",
+        "ELSE",
+        "TEXT",
+        "LENGTH_OF",
+        "IN",
+        "NOT_IN",
     }
 
     literals = ["(", ")", ",", ".", "[", "]"]
     ignore = " \t"
 
-    # NOTE: ordering of tokens should be in a way that more specific tokens (e.g: IS LESS THAN) come before less specific ones (e.g: IS)
+    def tokenize(self, text: str) -> Iterator[Token]:
+        index = 0
+        length = len(text)
+        # Bound locally, as they're looked up for each character.
+        ignored, identifier_start, digits, operators = _IGNORED, _IDENTIFIER_START, _DIGITS, _OPERATORS
+        match_identifier, match_number = _IDENTIFIER.match, _NUMBER.match
 
-    @_(r"\d+(\.\d+)?((\+|\-)\d+(\.\d*)?j)?")
-    def NUMBER(self, t):
-        try:
-            t.value = int(t.value)
-        except ValueError:
-            try:
-                t.value = float(t.value)
-            except ValueError:
-                t.value = complex(t.value)
+        while index < length:
+            character = text[index]
+
+            if character in ignored:
+                index += 1
+
+            elif character in identifier_start:
+                end = cast("re.Match[str]", match_identifier(text, index)).end()
+                word = text[index:end]
+                type = _KEYWORDS.get(word, "IDENTIFIER")
 
-        return t
+                for rest, phrase_type in _PHRASES.get(word, ()):
+                    phrase_end = end + len(rest)
 
-    PLUS = r"\+"
-    MINUS = r"-"
-    TIMES = r"\*"
-    DIVIDE = r"/"
-    POWER = r"\^"
+                    if text.startswith(rest, end) and (
+                            phrase_end == length or text[phrase_end] not in _IDENTIFIER_CHARACTERS):
+                        type = phrase_type
+                        end = phrase_end
+                        break
 
-    GREATER_THAN_OR_EQUAL = r"\>=|IS GREATER THAN OR EQUAL|is greater than or equal"
-    GREATER_THAN = r"\>|IS GREATER THAN|is greater than"
+                yield Token(type, text[index:end], index)
+                index = end
 
-    LESS_THAN_OR_EQUAL = r"\<=|IS LESS THAN OR EQUAL|is less than or equal"
-    LESS_THAN = r"\<|IS LESS THAN|is less than"
+            elif character in digits:
+                end = cast("re.Match[str]", match_number(text, index)).end()
+                yield Token("NUMBER", self._number(text[index:end]), index)
+                index = end
 
-    NOT_EQUAL = r"\!\=|IS NOT|is not"
+            elif character == '"':
+                end = text.find('"', index + 1)
 
-    EQUAL = r"\=\=|IS|is"
+                # Texts end on the line they start on.
+                if end == -1 or "\n" in text[index + 1:end]:
+                    self.error(character)
 
-    LENGTH_OF = r"length of|LENGTH OF"
+                yield Token("TEXT", text[index + 1:end], index)
+                index = end + 1
 
-    AND = r"\&\&|AND|and"
-    OR = r"\|\||OR|or"
-    NOT_IN = r"NOT IN|not in"
-    NOT = r"\!|NOT|not"
-    TRUE = r"true|TRUE|True"
-    FALSE = r"false|FALSE|False"
-    IF = r"if|IF"
-    IN = r"in|IN"
-    THEN = r"then|THEN"
-    ELSE = r"else|ELSE"
-    IDENTIFIER = r"[a-zA-Z_][a-zA-Z_0-9]*"
+            elif text[index:index + 2] in _TWO_CHARACTER_OPERATORS:
+                yield Token(_TWO_CHARACTER_OPERATORS[text[index:index + 2]], text[index:index + 2], index)
+                index += 2
 
-    @_(r"\".*?\"")
-    def TEXT(self, t):
-        t.value = t.value[1:-1]
-        return t
+            elif character in operators:
+                yield Token(operators[character], character, index)
+                index += 1
+
+            else:
+                self.error(character)
+
+    @staticmethod
+    def _number(value: str) -> Union[int, float, complex]:
+        try:
+            return int(value)
+        except ValueError:
+            try:
+                return float(value)
+            except ValueError:
+                return complex(value)
 
-    def error(self, token: Token):
-        raise LexError(f"Invalid token '{token.value[0]}'")
+    def error(self, character: str) -> NoReturn:
+        raise LexError(f"Invalid token '{character}'")
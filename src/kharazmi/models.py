@@ -1,18 +1,184 @@
 from abc import ABC, abstractmethod
-import functools
+import asyncio
+import bisect
+import inspect
+import operator
+import weakref
 
-from typing import Dict, List, Set
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Iterable, Iterator, List, Mapping, Optional, Sequence, Set, Tuple, TypeGuard, TypeVar, Union, cast
 
-from .types import Function, ListFactory, SupportsArithmetic, SupportsBoolean, SupportsConditional, SupportsList, SupportsString, TypedValue
+from .cache import LRUCache, constant_key
+from .registry import FunctionRegistry, default_registry
+from .types import AsyncFunction, CompiledExpression, Evaluator, Function, ListFactory, SupportsArithmetic, SupportsBoolean, SupportsConditional, SupportsList, SupportsString, TypedValue
+
+
+# Builtin scalar types that are known to support all arithmetic and comparison protocols,
+# so operators on them can be applied without going through the protocol checks in `_apply`.
+_SCALAR_TYPES: FrozenSet[type] = frozenset({int, float, complex, bool})
+
+_NO_NAMES: FrozenSet[str] = frozenset()
+
+# A list held by a variable, along with its index, see `BaseContainsExpression`.
+_ListIndex = Tuple[Any, Callable[[TypedValue], SupportsBoolean]]
+
+# Checking a value against a `runtime_checkable` protocol looks each of the protocol's members up on it, which is slow,
+# and `_apply` methods do it for every operand they get. Members are looked up on the value's type (as `isinstance` does
+# since python 3.12), so whether a type conforms to a protocol is checked once, and kept in these dispatch tables.
+_BOOLEAN_TYPES: Dict[type, bool] = {}
+_CONDITIONAL_TYPES: Dict[type, bool] = {}
+_ARITHMETIC_TYPES: Dict[type, bool] = {}
+_STRING_TYPES: Dict[type, bool] = {}
+_LIST_TYPES: Dict[type, bool] = {}
+
+
+def _conforms(conforming_types: Dict[type, bool], protocol: type, value: object) -> bool:
+    conforms = conforming_types[type(value)] = isinstance(value, protocol)
+    return conforms
+
+
+def _is_boolean(value: object) -> TypeGuard[SupportsBoolean]:
+    try:
+        return _BOOLEAN_TYPES[type(value)]
+    except KeyError:
+        return _conforms(_BOOLEAN_TYPES, SupportsBoolean, value)
+
+
+def _is_conditional(value: object) -> TypeGuard[SupportsConditional]:
+    try:
+        return _CONDITIONAL_TYPES[type(value)]
+    except KeyError:
+        return _conforms(_CONDITIONAL_TYPES, SupportsConditional, value)
+
+
+def _is_arithmetic(value: object) -> TypeGuard[SupportsArithmetic]:
+    try:
+        return _ARITHMETIC_TYPES[type(value)]
+    except KeyError:
+        return _conforms(_ARITHMETIC_TYPES, SupportsArithmetic, value)
+
+
+def _is_string(value: object) -> TypeGuard[SupportsString]:
+    try:
+        return _STRING_TYPES[type(value)]
+    except KeyError:
+        return _conforms(_STRING_TYPES, SupportsString, value)
+
+
+def _is_list(value: object) -> TypeGuard[SupportsList]:
+    try:
+        return _LIST_TYPES[type(value)]
+    except KeyError:
+        return _conforms(_LIST_TYPES, SupportsList, value)
+
+
+# Leaves are immutable, so the parser shares a single instance for each distinct variable name or constant instead of
+# building a new one for each occurrence. They're held weakly, so leaves no expression uses anymore are still freed.
+_interned_leaves: "weakref.WeakValueDictionary[Hashable, BaseExpression]" = weakref.WeakValueDictionary()
+
+_Leaf = TypeVar("_Leaf", bound="BaseExpression")
+
+
+def _intern(key: Hashable, build: Callable[[], _Leaf]) -> _Leaf:
+    leaf = _interned_leaves.get(key)
+
+    if leaf is None:
+        leaf = build()
+        _interned_leaves[key] = leaf
+
+    return cast(_Leaf, leaf)
+
+
+def _union(names: FrozenSet[str], other_names: FrozenSet[str]) -> FrozenSet[str]:
+    """
+    Most of the time one of the sets already contains the other, e.g: a parent and its only child with variables,
+    so that set is reused instead of each parent holding its own copy of it.
+    """
+
+    if other_names is names or other_names <= names:
+        return names
+
+    if names <= other_names:
+        return other_names
+
+    return names | other_names
+
+
+def _union_all(all_names: Iterable[FrozenSet[str]]) -> FrozenSet[str]:
+    """
+    The union of many sets, e.g: the variables of a list's items, reusing a set which contains all others like `_union`.
+    Sets adding new names are merged at once, so it takes linear time even if each item has a variable of its own.
+    """
+
+    names = _NO_NAMES
+    new_names: List[FrozenSet[str]] = []
+
+    for other_names in all_names:
+        if other_names is names or other_names <= names:
+            continue
+
+        if not new_names and names <= other_names:
+            names = other_names
+        else:
+            new_names.append(other_names)
+
+    return names.union(*new_names) if new_names else names
 
 
 class BaseExpression(ABC):
+    __slots__ = ("_variables", "_functions", "_node_count", "_depth")
+
+    _variables: FrozenSet[str]
+    _functions: FrozenSet[str]
+    _node_count: int
+    _depth: int
+
     @abstractmethod
     def evaluate(self, **variables_values: TypedValue) -> TypedValue: ...
 
-    @property
-    @abstractmethod
-    def variables(self) -> Set[str]: ...
+    @ property
+    def variables(self) -> FrozenSet[str]:
+        """
+        Names of the variables used in the expression. It's computed once, when the expression is built.
+        """
+
+        return self._variables
+
+    @ property
+    def functions(self) -> FrozenSet[str]:
+        """
+        Names of the functions called in the expression.
+        """
+
+        return self._functions
+
+    @ property
+    def node_count(self) -> int:
+        return self._node_count
+
+    @ property
+    def depth(self) -> int:
+        return self._depth
+
+    def _set_metadata(self, variables: FrozenSet[str] = _NO_NAMES, functions: FrozenSet[str] = _NO_NAMES) -> None:
+        """
+        Computes the expression's metadata out of its children's, it should be called at the end of `__init__`.
+        """
+
+        node_count = 1
+        depth = 0
+
+        for child in self._children:
+            variables = _union(variables, child._variables)
+            functions = _union(functions, child._functions)
+            node_count += child._node_count
+
+            if child._depth > depth:
+                depth = child._depth
+
+        self._variables = variables
+        self._functions = functions
+        self._node_count = node_count
+        self._depth = depth + 1
 
     @abstractmethod
     def __repr__(self) -> str: ...
@@ -20,6 +186,75 @@ class BaseExpression(ABC):
     @abstractmethod
     def __str__(self) -> str: ...
 
+    def compile(self, lazy: bool = False, list_cache_size: Optional[int] = None,
+                functions: Optional[FunctionRegistry] = None) -> CompiledExpression:
+        """
+        Builds a single callable out of the expression tree, which gives the same result as `evaluate`.
+
+        The tree is walked only once, here, and each node is turned into a closure over its children's closures.
+        Calling the result does not re-pack the variables into a new kwargs dict at each level,
+        nor does it look up any methods on the nodes.
+
+        If `lazy` is set, an `IF` whose condition is a `bool` only evaluates the branch it picks, and `&&` (`||`)
+        doesn't evaluate its right hand side if the left hand side is `False` (`True`). The parts that are skipped
+        don't raise their errors either. Conditions of any other type are still applied elementwise, after evaluating
+        all of the operands.
+
+        `IN` and `NOT IN` against a list of constants build the list once, and look values up in a set of its items.
+        If `list_cache_size` is given, large lists or tuples held by a variable on their right hand side get indexed
+        the same way the first time they're seen, and the indexes of the last `list_cache_size` of them are kept,
+        keyed by the identity of the list. Such lists must not be modified once they've been passed in.
+
+        Function calls are resolved here, against `functions` if it's given, or else the registry of the parser which
+        built them (see `FunctionRegistry`), and calling a function that isn't registered raises `ValueError`.
+        """
+
+        evaluator = CompilationContext(self, lazy, list_cache_size, functions).compile(self)
+
+        # kwargs are a new dict on each call, so they can safely hold the values of the shared nodes.
+        def compiled(**variables_values: TypedValue) -> TypedValue:
+            return evaluator(variables_values)
+
+        return compiled
+
+    def evaluate_many(self, rows: Iterable[Mapping[str, TypedValue]], lazy: bool = False,
+                      list_cache_size: Optional[int] = None,
+                      functions: Optional[FunctionRegistry] = None) -> Iterator[TypedValue]:
+        """
+        Lazily evaluates the expression once for each of the given variable bindings, in order.
+
+        The expression is compiled once for the whole batch and each row is handed to it as is,
+        so rows don't get copied into kwargs and the tree is not walked again for each one of them.
+        `lazy`, `list_cache_size` and `functions` have the same meaning as in `compile`.
+        """
+
+        context = CompilationContext(self, lazy, list_cache_size, functions)
+        evaluator = context.compile(self)
+
+        if context.has_shared_nodes:
+            # Values of the shared nodes are kept in the mapping, so each row needs a copy of its own.
+            return (evaluator(dict(row)) for row in rows)
+
+        return map(evaluator, rows)
+
+    async def evaluate_async(self, **variables_values: TypedValue) -> TypedValue:
+        """
+        Evaluates the expression like `evaluate` does, awaiting the results of asynchronous functions.
+
+        Operands which call a function are evaluated concurrently, using `asyncio.gather`, so independent calls wait
+        on each other's I/O. Operands that don't call any function have nothing to wait for, so they're evaluated
+        synchronously, and so are synchronous functions, which block the event loop as long as they run.
+        """
+
+        return self.evaluate(**variables_values)
+
+    @property
+    def _children(self) -> Sequence["BaseExpression"]:
+        return ()
+
+    @abstractmethod
+    def _compile(self, context: "CompilationContext") -> Evaluator: ...
+
     def __add__(self, operand: "BaseExpression") -> "BaseExpression":
         return AdditionExpression(self, operand)
 
@@ -81,9 +316,107 @@ class BaseExpression(ABC):
         return NotEqualExpression(self, operand)
 
 
+class CompilationContext(object):
+    """
+    Keeps track of the nodes compiled for an expression.
+
+    Expressions might be DAGs instead of trees (see `kharazmi.optimizer.eliminate_common_subexpressions`).
+    A node that is reachable through more than one path is compiled once, and its value is computed once per
+    evaluation: it gets stored in the variables mapping, under an integer key which can't clash with variable names.
+
+    If `lazy` is set, nodes which can skip some of their operands (see `BaseExpression.compile`) are compiled to do so.
+    If `list_cache_size` is given, `list_indexes` holds the indexes of the lists `IN` and `NOT IN` get from variables.
+    If `functions` is given, function calls are resolved against it rather than the registries of their nodes.
+    """
+
+    def __init__(self, root: BaseExpression, lazy: bool = False, list_cache_size: Optional[int] = None,
+                 functions: Optional[FunctionRegistry] = None) -> None:
+        self._references = _count_references(root)
+        self._evaluators: Dict[int, Evaluator] = {}
+        # Set once a shared node gets compiled. Leaves are shared too (see `_intern`), but they're not stored.
+        self.has_shared_nodes = False
+        self.lazy = lazy
+        self.functions = functions
+        self.list_indexes: Optional[LRUCache[int, _ListIndex]] = None
+
+        if list_cache_size is not None:
+            self.list_indexes = LRUCache(list_cache_size)
+
+    def compile(self, expression: BaseExpression) -> Evaluator:
+        key = id(expression)
+
+        if key in self._evaluators:
+            return self._evaluators[key]
+
+        evaluator = expression._compile(self)
+
+        if self._references.get(key, 1) > 1 and expression._children:
+            evaluator = self._shared(evaluator, len(self._evaluators))
+            self.has_shared_nodes = True
+
+        self._evaluators[key] = evaluator
+        return evaluator
+
+    @staticmethod
+    def _shared(evaluator: Evaluator, slot: int) -> Evaluator:
+        def shared_evaluator(variables_values: Mapping[str, TypedValue]) -> TypedValue:
+            scope = cast(Dict[Any, TypedValue], variables_values)
+
+            if slot in scope:
+                return scope[slot]
+
+            value = scope[slot] = evaluator(variables_values)
+            return value
+
+        return shared_evaluator
+
+
+def _count_references(root: BaseExpression) -> Dict[int, int]:
+    """
+    Counts the number of parents of each node (by its id) reachable from root.
+    """
+
+    references: Dict[int, int] = {}
+
+    stack = [root]
+    while stack:
+        expression = stack.pop()
+        references[id(expression)] = references.get(id(expression), 0) + 1
+
+        if references[id(expression)] == 1:
+            stack.extend(expression._children)
+
+    return references
+
+
+async def _evaluate_all_async(expressions: Sequence[BaseExpression],
+                              variables_values: Mapping[str, TypedValue]) -> List[TypedValue]:
+    """
+    Evaluates the expressions in order, awaiting the ones calling functions (see `BaseExpression.evaluate_async`)
+    concurrently.
+    """
+
+    calls = [expression.evaluate_async(**variables_values) for expression in expressions if expression._functions]
+
+    if not calls:
+        return [expression.evaluate(**variables_values) for expression in expressions]
+
+    results = iter(await asyncio.gather(*calls))
+
+    return [next(results) if expression._functions else expression.evaluate(**variables_values)
+            for expression in expressions]
+
+
 class Variable(BaseExpression):
+    __slots__ = ("_name", "__weakref__")
+
     def __init__(self, name: str) -> None:
         self._name = name
+        self._set_metadata(variables=frozenset((name,)))
+
+    @ classmethod
+    def interned(cls, name: str) -> "Variable":
+        return _intern((cls, name), lambda: cls(name))
 
     def evaluate(self, **variable_values: TypedValue) -> TypedValue:
         if self._name not in variable_values:
@@ -91,9 +424,16 @@ class Variable(BaseExpression):
 
         return variable_values[self._name]
 
-    @ property
-    def variables(self) -> Set[str]:
-        return {self._name}
+    def _compile(self, context: CompilationContext) -> Evaluator:
+        name = self._name
+
+        def evaluator(variables_values: Mapping[str, TypedValue]) -> TypedValue:
+            try:
+                return variables_values[name]
+            except KeyError:
+                raise ValueError(f"Variable `{name}` does not have a value!") from None
+
+        return evaluator
 
     def __repr__(self) -> str:
         return f"Variable('{self._name}')"
@@ -103,25 +443,52 @@ class Variable(BaseExpression):
 
 
 class FunctionExpression(BaseExpression):
-    supported_functions: Dict[str, Function] = {}
+    __slots__ = ("_name", "_argument", "_registry")
 
-    def __init__(self, name: str, argument: "FunctionArguments") -> None:
+    # Functions of `default_registry`, which expressions built without a registry of their own call.
+    supported_functions: Dict[str, Union[Function, AsyncFunction]] = default_registry.functions
+
+    def __init__(self, name: str, argument: "FunctionArguments", registry: Optional[FunctionRegistry] = None) -> None:
         self._name = name
         self._argument = argument
+        self._registry = registry if registry is not None else default_registry
+        # The arguments already know their variables, so the children only have to be checked against them.
+        self._set_metadata(variables=argument.variables, functions=frozenset((name,)))
+
+    @ property
+    def registry(self) -> FunctionRegistry:
+        return self._registry
 
     def evaluate(self, **variable_values: TypedValue) -> TypedValue:
-        if self._name not in self.supported_functions.keys():
-            raise ValueError(f"Function `{self._name}` has not been defined!")
+        return self._registry.resolve(self._name)(*self._argument.evaluate(**variable_values))
 
-        return self.supported_functions[self._name](*self._argument.evaluate(**variable_values))
+    async def evaluate_async(self, **variable_values: TypedValue) -> TypedValue:
+        function = self._registry.resolve_async(self._name)
+        result = function(*await self._argument.evaluate_async(**variable_values))
 
-    @ property
-    def variables(self) -> Set[str]:
-        return self._argument.variables
+        if inspect.isawaitable(result):
+            return await result
+
+        return result
+
+    @property
+    def _children(self) -> Sequence[BaseExpression]:
+        return self._argument._expressions
+
+    def _compile(self, context: CompilationContext) -> Evaluator:
+        # Resolved once, here, so an unknown function fails to compile.
+        function = (context.functions or self._registry).resolve(self._name)
+        argument = self._argument._compile(context)
+
+        def evaluator(variables_values: Mapping[str, TypedValue]) -> TypedValue:
+            return function(*argument(variables_values))
+
+        return evaluator
 
     @ classmethod
-    def register(cls, name: str, runner: Function) -> None:
-        cls.supported_functions[name] = runner
+    def register(cls, name: str, runner: Union[Function, AsyncFunction], pure: bool = False,
+                 cache_size: Optional[int] = None) -> None:
+        default_registry.register(name, runner, pure, cache_size)
 
     def __repr__(self) -> str:
         return f"Function('{self._name}', {repr(self._argument)})"
@@ -134,15 +501,29 @@ register_function = FunctionExpression.register
 
 
 class FunctionArguments(object):
+    __slots__ = ("_expressions", "_variables")
+
     def __init__(self, *expression: BaseExpression) -> None:
-        self._expressions = [*expression]
+        self._expressions = expression
+        self._variables = _union_all([item.variables for item in expression])
 
     def evaluate(self, **variable_values: TypedValue) -> List[TypedValue]:
         return [expression.evaluate(**variable_values) for expression in self._expressions]
 
+    async def evaluate_async(self, **variable_values: TypedValue) -> List[TypedValue]:
+        return await _evaluate_all_async(self._expressions, variable_values)
+
+    def _compile(self, context: CompilationContext) -> Callable[[Mapping[str, TypedValue]], List[TypedValue]]:
+        evaluators = [context.compile(expression) for expression in self._expressions]
+
+        def evaluator(variables_values: Mapping[str, TypedValue]) -> List[TypedValue]:
+            return [item(variables_values) for item in evaluators]
+
+        return evaluator
+
     @ property
-    def variables(self) -> Set[str]:
-        return functools.reduce(lambda a, b: a.union(b), [expression.variables for expression in self._expressions])
+    def variables(self) -> FrozenSet[str]:
+        return self._variables
 
     def append(self, op: BaseExpression) -> 'FunctionArguments':
         if not isinstance(op, BaseExpression):  # pyright: ignore ["reportUnnecessaryIsinstance"]
@@ -161,15 +542,24 @@ class FunctionArguments(object):
 
 
 class ListExpression(BaseExpression):
+    __slots__ = ("items",)
+
     def __init__(self, items: "ListItems") -> None:
         self.items = items
+        self._set_metadata(variables=items.variables)
 
     def evaluate(self, **variable_values: TypedValue) -> SupportsList:
         return self.items.evaluate(**variable_values)
 
-    @ property
-    def variables(self) -> Set[str]:
-        return self.items.variables
+    async def evaluate_async(self, **variable_values: TypedValue) -> SupportsList:
+        return await self.items.evaluate_async(**variable_values)
+
+    @property
+    def _children(self) -> Sequence[BaseExpression]:
+        return self.items._expressions
+
+    def _compile(self, context: CompilationContext) -> Evaluator:
+        return self.items._compile(context)
 
     def __repr__(self) -> str:
         return f"ListExpression({repr(self.items)})"
@@ -179,16 +569,31 @@ class ListExpression(BaseExpression):
 
 
 class ListItems(object):
+    __slots__ = ("_expressions", "_list_factory", "_variables")
+
     def __init__(self, list_factory: ListFactory, *expression: BaseExpression) -> None:
-        self._expressions = [*expression]
+        self._expressions = expression
         self._list_factory = list_factory
+        self._variables = _union_all([item.variables for item in expression])
 
     def evaluate(self, **variable_values: TypedValue) -> SupportsList:
         return self._list_factory([expression.evaluate(**variable_values) for expression in self._expressions])
 
+    async def evaluate_async(self, **variable_values: TypedValue) -> SupportsList:
+        return self._list_factory(await _evaluate_all_async(self._expressions, variable_values))
+
+    def _compile(self, context: CompilationContext) -> Callable[[Mapping[str, TypedValue]], SupportsList]:
+        list_factory = self._list_factory
+        evaluators = [context.compile(expression) for expression in self._expressions]
+
+        def evaluator(variables_values: Mapping[str, TypedValue]) -> SupportsList:
+            return list_factory([item(variables_values) for item in evaluators])
+
+        return evaluator
+
     @ property
-    def variables(self) -> Set[str]:
-        return functools.reduce(lambda a, b: a.union(b), [expression.variables for expression in self._expressions])
+    def variables(self) -> FrozenSet[str]:
+        return self._variables
 
     def append(self, op: BaseExpression) -> 'ListItems':
         if not isinstance(op, BaseExpression):  # pyright: ignore ["reportUnnecessaryIsinstance"]
@@ -204,16 +609,46 @@ class ListItems(object):
 
 
 class BaseUnaryExpression(BaseExpression):
+    __slots__ = ("_operand_expression",)
+
+    _scalar_operator: Optional[Callable[[Any], Any]] = None
+
     def __init__(self, operand_expression: BaseExpression) -> None:
         self._operand_expression = operand_expression
+        self._set_metadata()
 
     def evaluate(self, **variable_values: TypedValue) -> TypedValue:
         operand_value = self._operand_expression.evaluate(**variable_values)
         return self._apply(operand_value)
 
-    @ property
-    def variables(self) -> Set[str]:
-        return self._operand_expression.variables
+    async def evaluate_async(self, **variable_values: TypedValue) -> TypedValue:
+        operand_value = await self._operand_expression.evaluate_async(**variable_values)
+        return self._apply(operand_value)
+
+    @property
+    def _children(self) -> Sequence[BaseExpression]:
+        return (self._operand_expression,)
+
+    def _compile(self, context: CompilationContext) -> Evaluator:
+        operand = context.compile(self._operand_expression)
+        apply = self._apply
+        scalar_operator = self._scalar_operator
+
+        if scalar_operator is None:
+            def evaluator(variables_values: Mapping[str, TypedValue]) -> TypedValue:
+                return apply(operand(variables_values))
+
+            return evaluator
+
+        def scalar_evaluator(variables_values: Mapping[str, TypedValue]) -> TypedValue:
+            operand_value = operand(variables_values)
+
+            if type(operand_value) in _SCALAR_TYPES:
+                return scalar_operator(operand_value)
+
+            return apply(operand_value)
+
+        return scalar_evaluator
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}({repr(self._operand_expression)})"
@@ -230,18 +665,65 @@ class BaseUnaryExpression(BaseExpression):
 
 
 class BaseBinaryExpression(BaseExpression):
+    __slots__ = ("_left_hand_side_expression", "_right_hand_side_expression")
+
+    _scalar_operator: Optional[Callable[[Any, Any], Any]] = None
+    # The value of the left hand side which decides the result on its own, if there's one (e.g: `False` for AND),
+    # so the right hand side can be skipped in lazy mode.
+    _short_circuit_value: Optional[bool] = None
+
     def __init__(self, left_hand_side_expression: BaseExpression, right_hand_side_expression: BaseExpression) -> None:
         self._left_hand_side_expression = left_hand_side_expression
         self._right_hand_side_expression = right_hand_side_expression
+        self._set_metadata()
 
     def evaluate(self, **variables_values: TypedValue) -> TypedValue:
         left_hand_side_value = self._left_hand_side_expression.evaluate(**variables_values)
         right_hand_side_value = self._right_hand_side_expression.evaluate(**variables_values)
         return self._apply(left_hand_side_value, right_hand_side_value)
 
-    @ property
-    def variables(self) -> Set[str]:
-        return self._right_hand_side_expression.variables.union(self._left_hand_side_expression.variables)
+    async def evaluate_async(self, **variables_values: TypedValue) -> TypedValue:
+        left_hand_side_value, right_hand_side_value = await _evaluate_all_async(self._children, variables_values)
+        return self._apply(left_hand_side_value, right_hand_side_value)
+
+    @property
+    def _children(self) -> Sequence[BaseExpression]:
+        return (self._left_hand_side_expression, self._right_hand_side_expression)
+
+    def _compile(self, context: CompilationContext) -> Evaluator:
+        left_hand_side = context.compile(self._left_hand_side_expression)
+        right_hand_side = context.compile(self._right_hand_side_expression)
+        apply = self._apply
+        scalar_operator = self._scalar_operator
+        short_circuit_value = self._short_circuit_value
+
+        if context.lazy and short_circuit_value is not None:
+            def lazy_evaluator(variables_values: Mapping[str, TypedValue]) -> TypedValue:
+                left_hand_side_value = left_hand_side(variables_values)
+
+                if left_hand_side_value is short_circuit_value:
+                    return left_hand_side_value
+
+                return apply(left_hand_side_value, right_hand_side(variables_values))
+
+            return lazy_evaluator
+
+        if scalar_operator is None:
+            def evaluator(variables_values: Mapping[str, TypedValue]) -> TypedValue:
+                return apply(left_hand_side(variables_values), right_hand_side(variables_values))
+
+            return evaluator
+
+        def scalar_evaluator(variables_values: Mapping[str, TypedValue]) -> TypedValue:
+            left_hand_side_value = left_hand_side(variables_values)
+            right_hand_side_value = right_hand_side(variables_values)
+
+            if type(left_hand_side_value) in _SCALAR_TYPES and type(right_hand_side_value) in _SCALAR_TYPES:
+                return scalar_operator(left_hand_side_value, right_hand_side_value)
+
+            return apply(left_hand_side_value, right_hand_side_value)
+
+        return scalar_evaluator
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}({repr(self._left_hand_side_expression)}, {repr(self._right_hand_side_expression)})"
@@ -258,10 +740,13 @@ class BaseBinaryExpression(BaseExpression):
 
 
 class BaseTrinaryExpression(BaseExpression):
+    __slots__ = ("_operand1_expression", "_operand2_expression", "_operand3_expression")
+
     def __init__(self, operand1_expression: BaseExpression, operand2_expression: BaseExpression, operand3_expression: BaseExpression) -> None:
         self._operand1_expression = operand1_expression
         self._operand2_expression = operand2_expression
         self._operand3_expression = operand3_expression
+        self._set_metadata()
 
     def evaluate(self, **variable_values: TypedValue) -> TypedValue:
         operand1_value = self._operand1_expression.evaluate(**variable_values)
@@ -269,9 +754,24 @@ class BaseTrinaryExpression(BaseExpression):
         operand3_value = self._operand3_expression.evaluate(**variable_values)
         return self._apply(operand1_value, operand2_value, operand3_value)
 
-    @ property
-    def variables(self) -> Set[str]:
-        return self._operand1_expression.variables.union(self._operand2_expression.variables).union(self._operand3_expression.variables)
+    async def evaluate_async(self, **variable_values: TypedValue) -> TypedValue:
+        operand1_value, operand2_value, operand3_value = await _evaluate_all_async(self._children, variable_values)
+        return self._apply(operand1_value, operand2_value, operand3_value)
+
+    @property
+    def _children(self) -> Sequence[BaseExpression]:
+        return (self._operand1_expression, self._operand2_expression, self._operand3_expression)
+
+    def _compile(self, context: CompilationContext) -> Evaluator:
+        operand1 = context.compile(self._operand1_expression)
+        operand2 = context.compile(self._operand2_expression)
+        operand3 = context.compile(self._operand3_expression)
+        apply = self._apply
+
+        def evaluator(variables_values: Mapping[str, TypedValue]) -> TypedValue:
+            return apply(operand1(variables_values), operand2(variables_values), operand3(variables_values))
+
+        return evaluator
 
     @ abstractmethod
     def _apply(self, operand1_value: TypedValue, operand2_value: TypedValue,
@@ -279,203 +779,281 @@ class BaseTrinaryExpression(BaseExpression):
 
 
 class IfExpression(BaseTrinaryExpression):
+    __slots__ = ()
+
     def __repr__(self) -> str:
         return f"IfExpression({repr(self._operand1_expression)}, {repr(self._operand2_expression)}, {repr(self._operand3_expression)})"
 
     def __str__(self) -> str:
         return f"{str(self._operand1_expression)}?{str(self._operand2_expression)}:{str(self._operand3_expression)}"
 
+    def _compile(self, context: CompilationContext) -> Evaluator:
+        if not context.lazy:
+            return super()._compile(context)
+
+        condition = context.compile(self._operand1_expression)
+        choice1 = context.compile(self._operand2_expression)
+        choice2 = context.compile(self._operand3_expression)
+        apply = self._apply
+
+        def lazy_evaluator(variables_values: Mapping[str, TypedValue]) -> TypedValue:
+            # `bool` doesn't conform to the protocols of `TypedValue` as far as the type checker knows.
+            condition_value: Any = condition(variables_values)
+
+            if isinstance(condition_value, bool):
+                return choice1(variables_values) if condition_value else choice2(variables_values)
+
+            return apply(condition_value, choice1(variables_values), choice2(variables_values))
+
+        return lazy_evaluator
+
     def _apply(self, operand1_value: TypedValue, operand2_value: TypedValue, operand3_value: TypedValue) -> TypedValue:
         if isinstance(operand1_value, bool):
             return operand2_value if operand1_value else operand3_value
 
-        if isinstance(operand1_value, SupportsConditional):
+        if _is_conditional(operand1_value):
             return operand1_value._cond__(operand2_value, operand3_value)
 
         raise NotImplementedError("Conditional operation has not been implemented on the first operand.")
 
 
 class LengthExpression(BaseUnaryExpression):
+    __slots__ = ()
+
     @ property
     def _operator_symbol(self) -> str:
         return "len "
 
     def _apply(self, value: "TypedValue") -> SupportsArithmetic:
-        if not isinstance(value, SupportsString):
+        if not _is_string(value):
             raise ValueError("invalid arguments for - (negative) operation")
 
         return value.__len__()
 
 
 class AdditionExpression(BaseBinaryExpression):
+    __slots__ = ()
+
+    _scalar_operator = staticmethod(operator.add)
+
     @ property
     def _operator_symbol(self) -> str:
         return "+"
 
     def _apply(self, left_hand_side_value: "TypedValue", right_hand_side_value: "TypedValue") -> SupportsArithmetic | SupportsString | SupportsList:
-        if isinstance(left_hand_side_value, SupportsArithmetic) and isinstance(right_hand_side_value, SupportsArithmetic):
+        if _is_arithmetic(left_hand_side_value) and _is_arithmetic(right_hand_side_value):
             return left_hand_side_value + right_hand_side_value
 
-        if isinstance(left_hand_side_value, SupportsString) and isinstance(right_hand_side_value, SupportsString):
+        if _is_string(left_hand_side_value) and _is_string(right_hand_side_value):
             return left_hand_side_value + right_hand_side_value
 
-        if isinstance(left_hand_side_value, SupportsList) and isinstance(right_hand_side_value, SupportsList):
+        if _is_list(left_hand_side_value) and _is_list(right_hand_side_value):
             return left_hand_side_value + right_hand_side_value
 
         raise ValueError("invalid arguments for + operation (dose not supports arithmetic or string")
 
 
 class SubtractionExpression(BaseBinaryExpression):
+    __slots__ = ()
+
+    _scalar_operator = staticmethod(operator.sub)
+
     @ property
     def _operator_symbol(self) -> str:
         return "-"
 
     def _apply(self, left_hand_side_value: "TypedValue", right_hand_side_value: "TypedValue") -> SupportsArithmetic:
-        if not isinstance(left_hand_side_value, SupportsArithmetic) or not isinstance(right_hand_side_value, SupportsArithmetic):
+        if not _is_arithmetic(left_hand_side_value) or not _is_arithmetic(right_hand_side_value):
             raise ValueError("invalid arguments for - operation")
 
         return left_hand_side_value - right_hand_side_value
 
 
 class MultiplicationExpression(BaseBinaryExpression):
+    __slots__ = ()
+
+    _scalar_operator = staticmethod(operator.mul)
+
     @ property
     def _operator_symbol(self) -> str:
         return "*"
 
     def _apply(self, left_hand_side_value: "TypedValue", right_hand_side_value: "TypedValue") -> SupportsArithmetic:
-        if not isinstance(left_hand_side_value, SupportsArithmetic) or not isinstance(right_hand_side_value, SupportsArithmetic):
+        if not _is_arithmetic(left_hand_side_value) or not _is_arithmetic(right_hand_side_value):
             raise ValueError("invalid arguments for * operation")
 
         return left_hand_side_value * right_hand_side_value
 
 
 class DivisionExpression(BaseBinaryExpression):
+    __slots__ = ()
+
+    # Typeshed leaves the operands of `operator.truediv` untyped.
+    _scalar_operator = staticmethod(cast(Callable[[Any, Any], Any], operator.truediv))
+
     @ property
     def _operator_symbol(self) -> str:
         return "/"
 
     def _apply(self, left_hand_side_value: "TypedValue", right_hand_side_value: "TypedValue") -> SupportsArithmetic:
-        if not isinstance(left_hand_side_value, SupportsArithmetic) or not isinstance(right_hand_side_value, SupportsArithmetic):
+        if not _is_arithmetic(left_hand_side_value) or not _is_arithmetic(right_hand_side_value):
             raise ValueError("invalid arguments for / operation")
 
         return left_hand_side_value / right_hand_side_value
 
 
 class ExponentiationExpression(BaseBinaryExpression):
+    __slots__ = ()
+
+    # Typeshed leaves the operands of `operator.pow` untyped.
+    _scalar_operator = staticmethod(cast(Callable[[Any, Any], Any], operator.pow))
+
     @ property
     def _operator_symbol(self) -> str:
         return "^"
 
     def _apply(self, left_hand_side_value: "TypedValue", right_hand_side_value: "TypedValue") -> SupportsArithmetic:
-        if not isinstance(left_hand_side_value, SupportsArithmetic) or not isinstance(right_hand_side_value, SupportsArithmetic):
+        if not _is_arithmetic(left_hand_side_value) or not _is_arithmetic(right_hand_side_value):
             raise ValueError("invalid arguments for / operation")
 
         return left_hand_side_value ** right_hand_side_value
 
 
 class NegativeExpression(BaseUnaryExpression):
+    __slots__ = ()
+
+    _scalar_operator = staticmethod(operator.neg)
+
     @ property
     def _operator_symbol(self) -> str:
         return "-"
 
     def _apply(self, value: "TypedValue") -> SupportsArithmetic:
-        if not isinstance(value, SupportsArithmetic):
+        if not _is_arithmetic(value):
             raise ValueError("invalid arguments for - (negative) operation")
 
         return -value
 
 
 class EqualExpression(BaseBinaryExpression):
+    __slots__ = ()
+
+    _scalar_operator = staticmethod(operator.eq)
+
     @ property
     def _operator_symbol(self) -> str:
         return "=="
 
     def _apply(self, left_hand_side_value: "TypedValue", right_hand_side_value: "TypedValue") -> SupportsBoolean:
-        if isinstance(left_hand_side_value, SupportsArithmetic) and isinstance(right_hand_side_value, SupportsArithmetic):
+        if _is_arithmetic(left_hand_side_value) and _is_arithmetic(right_hand_side_value):
             return left_hand_side_value == right_hand_side_value
 
-        if isinstance(left_hand_side_value, SupportsBoolean) and isinstance(right_hand_side_value, SupportsBoolean):
+        if _is_boolean(left_hand_side_value) and _is_boolean(right_hand_side_value):
             return left_hand_side_value == right_hand_side_value
 
-        if isinstance(left_hand_side_value, SupportsString) and isinstance(right_hand_side_value, SupportsString):
+        if _is_string(left_hand_side_value) and _is_string(right_hand_side_value):
             return left_hand_side_value == right_hand_side_value
 
-        if isinstance(left_hand_side_value, SupportsList) and isinstance(right_hand_side_value, SupportsList):
+        if _is_list(left_hand_side_value) and _is_list(right_hand_side_value):
             return left_hand_side_value == right_hand_side_value
 
         raise ValueError("invalid arguments for EQUAL operation")
 
 
 class NotEqualExpression(BaseBinaryExpression):
+    __slots__ = ()
+
+    _scalar_operator = staticmethod(operator.ne)
+
     @ property
     def _operator_symbol(self) -> str:
         return "!="
 
     def _apply(self, left_hand_side_value: "TypedValue", right_hand_side_value: "TypedValue") -> SupportsBoolean:
-        if isinstance(left_hand_side_value, SupportsArithmetic) and isinstance(right_hand_side_value, SupportsArithmetic):
+        if _is_arithmetic(left_hand_side_value) and _is_arithmetic(right_hand_side_value):
             return left_hand_side_value != right_hand_side_value
 
-        if isinstance(left_hand_side_value, SupportsBoolean) and isinstance(right_hand_side_value, SupportsBoolean):
+        if _is_boolean(left_hand_side_value) and _is_boolean(right_hand_side_value):
             return left_hand_side_value != right_hand_side_value
 
-        if isinstance(left_hand_side_value, SupportsString) and isinstance(right_hand_side_value, SupportsString):
+        if _is_string(left_hand_side_value) and _is_string(right_hand_side_value):
             return left_hand_side_value != right_hand_side_value
 
-        if isinstance(left_hand_side_value, SupportsList) and isinstance(right_hand_side_value, SupportsList):
+        if _is_list(left_hand_side_value) and _is_list(right_hand_side_value):
             return left_hand_side_value != right_hand_side_value
 
         raise ValueError("invalid arguments for NOT EQUAL operation")
 
 
 class LessThanExpression(BaseBinaryExpression):
+    __slots__ = ()
+
+    _scalar_operator = staticmethod(operator.lt)
+
     @ property
     def _operator_symbol(self) -> str:
         return "<"
 
     def _apply(self, left_hand_side_value: "TypedValue", right_hand_side_value: "TypedValue") -> SupportsBoolean:
-        if not isinstance(left_hand_side_value, SupportsArithmetic) or not isinstance(right_hand_side_value, SupportsArithmetic):
+        if not _is_arithmetic(left_hand_side_value) or not _is_arithmetic(right_hand_side_value):
             raise ValueError("invalid arguments for < operation")
 
         return left_hand_side_value < right_hand_side_value
 
 
 class LessThanOrEqualExpression(BaseBinaryExpression):
+    __slots__ = ()
+
+    _scalar_operator = staticmethod(operator.le)
+
     @ property
     def _operator_symbol(self) -> str:
         return "<="
 
     def _apply(self, left_hand_side_value: "TypedValue", right_hand_side_value: "TypedValue") -> SupportsBoolean:
-        if not isinstance(left_hand_side_value, SupportsArithmetic) or not isinstance(right_hand_side_value, SupportsArithmetic):
+        if not _is_arithmetic(left_hand_side_value) or not _is_arithmetic(right_hand_side_value):
             raise ValueError("invalid arguments for <= operation")
 
         return left_hand_side_value <= right_hand_side_value
 
 
 class GreaterThanExpression(BaseBinaryExpression):
+    __slots__ = ()
+
+    _scalar_operator = staticmethod(operator.gt)
+
     @ property
     def _operator_symbol(self) -> str:
         return ">"
 
     def _apply(self, left_hand_side_value: "TypedValue", right_hand_side_value: "TypedValue") -> SupportsBoolean:
-        if not isinstance(left_hand_side_value, SupportsArithmetic) or not isinstance(right_hand_side_value, SupportsArithmetic):
+        if not _is_arithmetic(left_hand_side_value) or not _is_arithmetic(right_hand_side_value):
             raise ValueError("invalid arguments for > operation")
 
         return left_hand_side_value > right_hand_side_value
 
 
 class GreaterThanOrEqualExpression(BaseBinaryExpression):
+    __slots__ = ()
+
+    _scalar_operator = staticmethod(operator.ge)
+
     @ property
     def _operator_symbol(self) -> str:
         return ">="
 
     def _apply(self, left_hand_side_value: "TypedValue", right_hand_side_value: "TypedValue") -> SupportsBoolean:
-        if not isinstance(left_hand_side_value, SupportsArithmetic) or not isinstance(right_hand_side_value, SupportsArithmetic):
+        if not _is_arithmetic(left_hand_side_value) or not _is_arithmetic(right_hand_side_value):
             raise ValueError("invalid arguments for >= operation")
 
         return left_hand_side_value >= right_hand_side_value
 
 
 class AndExpression(BaseBinaryExpression):
+    __slots__ = ()
+
+    _short_circuit_value = False
+
     @ property
     def _operator_symbol(self) -> str:
         return "AND"
@@ -484,13 +1062,17 @@ class AndExpression(BaseBinaryExpression):
         if isinstance(left_hand_side_value, bool) and isinstance(right_hand_side_value, bool):
             return left_hand_side_value and right_hand_side_value
 
-        if not isinstance(left_hand_side_value, SupportsBoolean) or not isinstance(right_hand_side_value, SupportsBoolean):
+        if not _is_boolean(left_hand_side_value) or not _is_boolean(right_hand_side_value):
             raise ValueError("invalid arguments for AND operation")
 
         return left_hand_side_value & right_hand_side_value
 
 
 class OrExpression(BaseBinaryExpression):
+    __slots__ = ()
+
+    _short_circuit_value = True
+
     @ property
     def _operator_symbol(self) -> str:
         return "OR"
@@ -499,13 +1081,15 @@ class OrExpression(BaseBinaryExpression):
         if isinstance(left_hand_side_value, bool) and isinstance(right_hand_side_value, bool):
             return left_hand_side_value or right_hand_side_value
 
-        if not isinstance(left_hand_side_value, SupportsBoolean) or not isinstance(right_hand_side_value, SupportsBoolean):
+        if not _is_boolean(left_hand_side_value) or not _is_boolean(right_hand_side_value):
             raise ValueError("invalid arguments for OR operation")
 
         return left_hand_side_value | right_hand_side_value
 
 
 class NotExpression(BaseUnaryExpression):
+    __slots__ = ()
+
     @ property
     def _operator_symbol(self) -> str:
         return "NOT"
@@ -514,51 +1098,190 @@ class NotExpression(BaseUnaryExpression):
         if isinstance(operand_value, bool):
             return not operand_value
 
-        if not isinstance(operand_value, SupportsBoolean):
+        if not _is_boolean(operand_value):
             raise ValueError("invalid arguments for NOT operation")
 
         return ~operand_value
 
 
-class ContainsExpression(BaseBinaryExpression):
-    @ property
-    def _operator_symbol(self) -> str:
-        return "IN"
+# Lists shorter than this are scanned, as that's about as fast as looking them up in an index.
+_MIN_INDEXED_LIST_SIZE = 64
 
-    def _apply(self, left_hand_side_value: TypedValue, right_hand_side_value: TypedValue) -> TypedValue:
-        if not isinstance(right_hand_side_value, SupportsList):
-            raise ValueError("invalid arguments for IN operation")
+# Types are checked by looking them up in sets, as the protocols of `TypedValue` hide these types from the type checker.
+_INDEXED_TYPES: FrozenSet[type] = frozenset({int, float, complex, bool, str})
+_INDEXED_LISTS: FrozenSet[type] = frozenset({list, tuple})
 
-        return right_hand_side_value.__contains__(left_hand_side_value)
 
+def _membership_test(items: SupportsList) -> Callable[[TypedValue], SupportsBoolean]:
+    """
+    Returns a function telling whether a value is in `items`, which is looked up many times.
 
-class NotContainsExpression(BaseBinaryExpression):
-    @ property
-    def _operator_symbol(self) -> str:
-        return "NOT IN"
+    Numbers and strings in lists and tuples are put in a set, as their hashes agree with their equality. Nested lists
+    are sorted when they can be, and searched using bisection, as python orders lists consistently with their equality.
+    Values of any other type, e.g: numpy's, might compare to the items in other ways, so they're looked up using
+    `items.__contains__`, like containers other than lists and tuples always are.
+    """
+
+    if type(items) not in _INDEXED_LISTS:
+        return items.__contains__
+
+    hashed: Set[Any] = set()
+    others: List[Any] = []
+
+    for item in cast(Iterable[Any], items):
+        if type(item) in _INDEXED_TYPES:
+            hashed.add(item)
+        else:
+            others.append(item)
+
+    ordered: Optional[List[Any]] = None
+
+    if others and all(type(item) is list for item in others):
+        try:
+            ordered = sorted(others)
+        except TypeError:
+            pass
+
+    def contains(value: object) -> Any:
+        value_type = type(value)
+
+        if value_type in _INDEXED_TYPES:
+            return value in hashed or (bool(others) and value in others)
+
+        if value_type is list:
+            if ordered is not None:
+                try:
+                    index = bisect.bisect_left(ordered, value)
+                    return index < len(ordered) and ordered[index] == value
+                except TypeError:
+                    pass
+
+            return value in others
+
+        return items.__contains__(cast(TypedValue, value))
+
+    return contains
+
+
+class BaseContainsExpression(BaseBinaryExpression):
+    """
+    Base of `IN` and `NOT IN`.
+
+    When compiled against a list literal of constants, the list is built once and indexed (see `_membership_test`)
+    instead of being built and scanned on each evaluation. Lists held by variables are indexed too, if a cache is
+    given to `compile`.
+    """
+
+    __slots__ = ()
+
+    _negated: bool = False
 
     def _apply(self, left_hand_side_value: TypedValue, right_hand_side_value: TypedValue) -> TypedValue:
-        if not isinstance(right_hand_side_value, SupportsList):
+        if not _is_list(right_hand_side_value):
             raise ValueError("invalid arguments for IN operation")
 
-        contains = right_hand_side_value.__contains__(left_hand_side_value)
+        return self._result(right_hand_side_value.__contains__(left_hand_side_value))
+
+    def _result(self, contains: SupportsBoolean) -> TypedValue:
+        if not self._negated:
+            return contains
 
         if isinstance(contains, bool):
             return not contains
 
         return ~ contains
 
+    def _compile(self, context: CompilationContext) -> Evaluator:
+        right_hand_side_expression = self._right_hand_side_expression
+
+        if (isinstance(right_hand_side_expression, ListExpression) and not right_hand_side_expression.variables
+                and not right_hand_side_expression.functions):
+            try:
+                items = right_hand_side_expression.evaluate()
+            except Exception:
+                # Left as is, so the error still gets raised when the expression is evaluated.
+                return super()._compile(context)
+
+            if _is_list(items):
+                return self._compile_membership(context, _membership_test(items))
+
+        if context.list_indexes is not None and isinstance(right_hand_side_expression, Variable):
+            return self._compile_indexed(context, context.list_indexes)
+
+        return super()._compile(context)
+
+    def _compile_membership(self, context: CompilationContext,
+                            contains: Callable[[TypedValue], SupportsBoolean]) -> Evaluator:
+        left_hand_side = context.compile(self._left_hand_side_expression)
+        result = self._result
+
+        if not self._negated:
+            return lambda variables_values: contains(left_hand_side(variables_values))
+
+        return lambda variables_values: result(contains(left_hand_side(variables_values)))
+
+    def _compile_indexed(self, context: CompilationContext, list_indexes: LRUCache[int, _ListIndex]) -> Evaluator:
+        left_hand_side = context.compile(self._left_hand_side_expression)
+        right_hand_side = context.compile(self._right_hand_side_expression)
+        apply = self._apply
+        result = self._result
+
+        def evaluator(variables_values: Mapping[str, TypedValue]) -> TypedValue:
+            left_hand_side_value = left_hand_side(variables_values)
+            right_hand_side_value: Any = right_hand_side(variables_values)
+
+            if type(right_hand_side_value) in _INDEXED_LISTS and len(right_hand_side_value) >= _MIN_INDEXED_LIST_SIZE:
+                # The entry holds on to the list, so its id can't be reused by another object while it's cached.
+                _, contains = list_indexes.get_or_compute(
+                    id(right_hand_side_value),
+                    lambda: (right_hand_side_value, _membership_test(right_hand_side_value)),
+                )
+                return result(contains(left_hand_side_value))
+
+            return apply(left_hand_side_value, right_hand_side_value)
+
+        return evaluator
+
+
+class ContainsExpression(BaseContainsExpression):
+    __slots__ = ()
+
+    @ property
+    def _operator_symbol(self) -> str:
+        return "IN"
+
+
+class NotContainsExpression(BaseContainsExpression):
+    __slots__ = ()
+
+    _negated = True
+
+    @ property
+    def _operator_symbol(self) -> str:
+        return "NOT IN"
+
 
 class Text(BaseExpression):
+    __slots__ = ("_value", "__weakref__")
+
     def __init__(self, value: str) -> None:
         self._value = value
+        self._set_metadata()
+
+    @ classmethod
+    def interned(cls, value: str) -> "Text":
+        return _intern((cls, value), lambda: cls(value))
 
     def evaluate(self, **_: TypedValue) -> str:
         return self._value
 
-    @ property
-    def variables(self) -> Set[str]:
-        return set()
+    def _compile(self, context: CompilationContext) -> Evaluator:
+        value = cast(TypedValue, self._value)
+
+        def evaluator(_: Mapping[str, TypedValue]) -> TypedValue:
+            return value
+
+        return evaluator
 
     def __repr__(self):
         return f"Text('{repr(self._value)}')"
@@ -568,6 +1291,8 @@ class Text(BaseExpression):
 
 
 class Number(BaseExpression):
+    __slots__ = ("_value", "__weakref__")
+
     def __init__(self, value: str) -> None:
         self._value: int | float | complex
 
@@ -579,12 +1304,39 @@ class Number(BaseExpression):
             except ValueError:
                 self._value = complex(value)
 
+        self._set_metadata()
+
+    @ classmethod
+    def interned(cls, value: str) -> "Number":
+        # 1, 1.0 and True are equal, so the type is a part of the key.
+        return _intern((cls, type(value), value), lambda: cls(value))
+
+    @ classmethod
+    def from_value(cls, value: int | float | complex) -> "Number":
+        """
+        Builds a number holding the given value as it is, rather than parsing its text, which isn't always possible,
+        e.g: python refuses to convert ints of more than 4300 digits to and from strings.
+        """
+
+        number = cls.__new__(cls)
+        number._value = value
+        number._set_metadata()
+        return number
+
+    @ classmethod
+    def interned_value(cls, value: int | float | complex) -> "Number":
+        return _intern((cls, constant_key(value)), lambda: cls.from_value(value))
+
     def evaluate(self, **_: TypedValue) -> int | float | complex:
         return self._value
 
-    @ property
-    def variables(self) -> Set[str]:
-        return set()
+    def _compile(self, context: CompilationContext) -> Evaluator:
+        value = cast(TypedValue, self._value)
+
+        def evaluator(_: Mapping[str, TypedValue]) -> TypedValue:
+            return value
+
+        return evaluator
 
     def __repr__(self):
         return f"Number('{repr(self._value)}')"
@@ -594,15 +1346,26 @@ class Number(BaseExpression):
 
 
 class Boolean(BaseExpression):
+    __slots__ = ("_value", "__weakref__")
+
     def __init__(self, value: bool) -> None:
         self._value = value
+        self._set_metadata()
+
+    @ classmethod
+    def interned(cls, value: bool) -> "Boolean":
+        return _intern((cls, value), lambda: cls(value))
 
     def evaluate(self, **_: TypedValue) -> bool:
         return self._value
 
-    @ property
-    def variables(self) -> Set[str]:
-        return set()
+    def _compile(self, context: CompilationContext) -> Evaluator:
+        value = cast(TypedValue, self._value)
+
+        def evaluator(_: Mapping[str, TypedValue]) -> TypedValue:
+            return value
+
+        return evaluator
 
     def __repr__(self):
         return f"Boolean('{repr(self._value)}')"
@@ -0,0 +1,234 @@
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple, cast
+
+from .cache import constant_key
+from .models import (AndExpression, BaseBinaryExpression, BaseExpression, BaseTrinaryExpression, BaseUnaryExpression,
+                     Boolean, ContainsExpression, DivisionExpression, EqualExpression, ExponentiationExpression,
+                     FunctionArguments, FunctionExpression, GreaterThanExpression, GreaterThanOrEqualExpression,
+                     IfExpression, LengthExpression, LessThanExpression, LessThanOrEqualExpression, ListExpression,
+                     ListItems, MultiplicationExpression, NegativeExpression, NotContainsExpression, NotEqualExpression,
+                     NotExpression, Number, OrExpression, SubtractionExpression, Text, Variable)
+from .types import TypedValue
+
+
+# Nodes which only accept arithmetic operands, and return an arithmetic (never a boolean) value for them.
+_ARITHMETIC_NODES = (SubtractionExpression, MultiplicationExpression, DivisionExpression, ExponentiationExpression,
+                     NegativeExpression, LengthExpression)
+
+# Nodes which return a boolean value.
+_BOOLEAN_NODES = (EqualExpression, NotEqualExpression, LessThanExpression, LessThanOrEqualExpression,
+                  GreaterThanExpression, GreaterThanOrEqualExpression, AndExpression, OrExpression, NotExpression,
+                  ContainsExpression, NotContainsExpression, Boolean)
+
+
+def optimize(expression: BaseExpression) -> BaseExpression:
+    """
+    Returns an equivalent expression, with its constant parts computed ahead of time.
+
+    - Subtrees without any variables or function calls are evaluated once and replaced by a `Number`, `Boolean`
+      or `Text`, if their value is one of those. Subtrees whose evaluation fails are left as they are,
+      so the error still gets raised when the expression is evaluated.
+    - `IF` expressions with a constant condition are replaced by the branch they would pick.
+      Keep in mind that the other branch is not going to be evaluated anymore, neither are its errors raised.
+    - `x * 1` and `1 * x` are replaced by `x`, and `!!x` by `x`, but only if `x` is known to be an
+      arithmetic (for the former) or boolean (for the latter) value, so non-numeric values never get a different result.
+
+    The given expression is not modified.
+    """
+
+    optimized, _ = _optimize(expression)
+    return optimized
+
+
+def _optimize(expression: BaseExpression) -> Tuple[BaseExpression, bool]:
+    """
+    Returns the optimized expression, along with whether it's a constant (i.e. has no variables nor function calls).
+    """
+
+    if isinstance(expression, Variable):
+        return expression, False
+
+    if isinstance(expression, (Number, Text, Boolean)):
+        return expression, True
+
+    if isinstance(expression, FunctionExpression):
+        arguments = [_optimize(item)[0] for item in expression._argument._expressions]
+        return FunctionExpression(expression._name, FunctionArguments(*arguments), expression.registry), False
+
+    if isinstance(expression, ListExpression):
+        optimized_items = [_optimize(item) for item in expression.items._expressions]
+        items = ListItems(expression.items._list_factory, *[item for item, _ in optimized_items])
+        return ListExpression(items), all(is_constant for _, is_constant in optimized_items)
+
+    if isinstance(expression, BaseUnaryExpression):
+        operand, is_constant = _optimize(expression._operand_expression)
+
+        if isinstance(expression, NotExpression) and isinstance(operand, NotExpression):
+            if isinstance(operand._operand_expression, _BOOLEAN_NODES):
+                return operand._operand_expression, is_constant
+
+        return _fold(type(expression)(operand), is_constant)
+
+    if isinstance(expression, BaseBinaryExpression):
+        left_hand_side, left_hand_side_is_constant = _optimize(expression._left_hand_side_expression)
+        right_hand_side, right_hand_side_is_constant = _optimize(expression._right_hand_side_expression)
+
+        identity = _apply_identities(expression, left_hand_side, right_hand_side)
+        if identity is not None:
+            return identity, left_hand_side_is_constant and right_hand_side_is_constant
+
+        optimized = type(expression)(left_hand_side, right_hand_side)
+        return _fold(optimized, left_hand_side_is_constant and right_hand_side_is_constant)
+
+    if isinstance(expression, BaseTrinaryExpression):
+        operand1, operand1_is_constant = _optimize(expression._operand1_expression)
+        operand2, operand2_is_constant = _optimize(expression._operand2_expression)
+        operand3, operand3_is_constant = _optimize(expression._operand3_expression)
+
+        if isinstance(expression, IfExpression) and isinstance(operand1, Boolean):
+            return (operand2, operand2_is_constant) if operand1._value else (operand3, operand3_is_constant)
+
+        optimized = type(expression)(operand1, operand2, operand3)
+        return _fold(optimized, operand1_is_constant and operand2_is_constant and operand3_is_constant)
+
+    return expression, False
+
+
+def _apply_identities(expression: BaseBinaryExpression, left_hand_side: BaseExpression,
+                      right_hand_side: BaseExpression) -> Optional[BaseExpression]:
+    # `x + 0` isn't replaced, since it's not `x` for every float: `-0.0 + 0` is `0.0`.
+    if not isinstance(expression, MultiplicationExpression):
+        return None
+
+    if _is_number(right_hand_side, 1) and isinstance(left_hand_side, _ARITHMETIC_NODES):
+        return left_hand_side
+
+    if _is_number(left_hand_side, 1) and isinstance(right_hand_side, _ARITHMETIC_NODES):
+        return right_hand_side
+
+    return None
+
+
+def _is_number(expression: BaseExpression, value: int) -> bool:
+    return isinstance(expression, Number) and type(expression._value) is int and expression._value == value
+
+
+def _fold(expression: BaseExpression, is_constant: bool) -> Tuple[BaseExpression, bool]:
+    if not is_constant:
+        return expression, False
+
+    try:
+        value = expression.evaluate()
+    except Exception:
+        return expression, True
+
+    return _to_constant(value) or expression, True
+
+
+def _to_constant(typed_value: TypedValue) -> Optional[BaseExpression]:
+    # Types are checked exactly, rather than using `isinstance`, so subclasses (e.g: numpy's `float64`) never end up in
+    # the tree in place of the builtin types. The protocols of `TypedValue` hide these types from the type checker, so
+    # it's cast to `object`.
+    value = cast(object, typed_value)
+
+    if type(value) is bool:
+        return Boolean(value)
+
+    if type(value) is int or type(value) is float or type(value) is complex:
+        return Number.from_value(value)
+
+    if type(value) is str:
+        return Text(value)
+
+    return None
+
+
+def structural_key(expression: BaseExpression) -> Hashable:
+    """
+    Returns a hashable key which is equal for two expressions iff they have the same structure,
+    i.e: the same node types, with the same variables, constants and functions, in the same places.
+
+    It's needed because `==` on expressions doesn't compare them, it builds an `EqualExpression`.
+    """
+
+    # Each distinct structure is numbered in the order it's first met, and described by its own key along with the
+    # numbers of its children. Their sequence is the key, so subexpressions appearing more than once (e.g: shared nodes
+    # of a DAG) are visited, and held in the key, only once.
+    numbers: Dict[Hashable, int] = {}
+    visited: Dict[int, int] = {}
+
+    def visit(node: BaseExpression) -> int:
+        if id(node) in visited:
+            return visited[id(node)]
+
+        key: Hashable = (*_node_key(node), *(visit(child) for child in node._children))
+        number = visited[id(node)] = numbers.setdefault(key, len(numbers))
+        return number
+
+    visit(expression)
+    return tuple(numbers)
+
+
+def eliminate_common_subexpressions(expression: BaseExpression, merge_function_calls: bool = False) -> BaseExpression:
+    """
+    Returns an equivalent expression in which structurally identical subexpressions are the same node,
+    turning the tree into a DAG. Compiled expressions compute each of these shared nodes once per evaluation.
+
+    Function calls are only merged if `merge_function_calls` is set, as the registered functions might not be pure.
+
+    The given expression is not modified.
+    """
+
+    canonical_nodes: Dict[Hashable, Tuple[int, BaseExpression]] = {}
+    visited: Dict[int, Tuple[int, BaseExpression]] = {}
+
+    def visit(node: BaseExpression) -> Tuple[int, BaseExpression]:
+        if id(node) in visited:
+            return visited[id(node)]
+
+        children = [visit(child) for child in node._children]
+        key: Hashable = (*_node_key(node), *(number for number, _ in children))
+
+        if isinstance(node, FunctionExpression) and not merge_function_calls:
+            key = (key, id(node))
+
+        if key not in canonical_nodes:
+            canonical_node = node
+            canonical_children = [child for _, child in children]
+
+            if any(new is not old for new, old in zip(canonical_children, node._children)):
+                canonical_node = _rebuild(node, canonical_children)
+
+            canonical_nodes[key] = (len(canonical_nodes), canonical_node)
+
+        visited[id(node)] = canonical_nodes[key]
+        return canonical_nodes[key]
+
+    _, result = visit(expression)
+    return result
+
+
+def _node_key(expression: BaseExpression) -> Tuple[Hashable, ...]:
+    if isinstance(expression, Variable):
+        return (Variable, expression._name)
+
+    if isinstance(expression, (Number, Text, Boolean)):
+        return (type(expression), constant_key(expression._value))
+
+    if isinstance(expression, FunctionExpression):
+        return (FunctionExpression, expression._name, id(expression.registry))
+
+    if isinstance(expression, ListExpression):
+        return (ListExpression, id(expression.items._list_factory))
+
+    return (type(expression),)
+
+
+def _rebuild(expression: BaseExpression, children: Sequence[BaseExpression]) -> BaseExpression:
+    if isinstance(expression, FunctionExpression):
+        return FunctionExpression(expression._name, FunctionArguments(*children), expression.registry)
+
+    if isinstance(expression, ListExpression):
+        return ListExpression(ListItems(expression.items._list_factory, *children))
+
+    items: List[BaseExpression] = list(children)
+    return type(expression)(*items)
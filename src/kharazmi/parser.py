@@ -1,11 +1,116 @@
-from typing import NoReturn, Optional
+import hashlib
+import itertools
+import json
+import os
+import tempfile
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, NamedTuple, NoReturn, Optional, Tuple, Union, cast
+
+import sly
 from sly import Parser
+from sly.yacc import LRTable, YaccError
 
+from .cache import CacheInfo, LRUCache
 from .types import ListFactory
 
 from .exceptions import ParseError
 from .models import BaseExpression, ContainsExpression, ListExpression, ListItems, NotContainsExpression, Text, Boolean, Variable, Number, IfExpression, FunctionExpression, FunctionArguments, LengthExpression
 from .lexer import EquationLexer
+from .pratt import PrattParser
+from .serialization import dumps, loads
+from .registry import FunctionRegistry
+
+
+_BACKENDS = ("lalr", "pratt")
+
+# Upper bound of the number of inputs sent to a worker at once, by `parse_many`.
+_MAX_CHUNK_SIZE = 1024
+
+# Parsers of the worker processes of `parse_many`, by backend.
+_worker_parsers: Dict[str, "EquationParser"] = {}
+
+
+class _ParsingTables(NamedTuple):
+    """
+    The parts of sly's `LRTable` that are used while parsing, which are all that's stored in the tables' cache.
+    """
+
+    lr_action: Dict[int, Dict[str, int]]
+    lr_goto: Dict[int, Dict[str, int]]
+    defaulted_states: Dict[int, int]
+
+
+def _cache_directory() -> Optional[str]:
+    directory = os.environ.get("KHARAZMI_CACHE_DIR")
+
+    if directory:
+        return directory
+
+    cache_home = os.environ.get("XDG_CACHE_HOME")
+
+    if not cache_home:
+        home = os.path.expanduser("~")
+
+        # Without a home directory, `expanduser` gives "~" back, which would put the cache under the working directory.
+        if home == "~":
+            return None
+
+        cache_home = os.path.join(home, ".cache")
+
+    return os.path.join(cache_home, "kharazmi")
+
+
+def _grammar_hash(grammar: Any) -> str:
+    # Anything that changes the generated tables has to change the hash: the productions (the first of them is built
+    # from the start symbol), their precedences, and the version of sly generating the tables.
+    description = repr((
+        sly.__version__,
+        [(str(production), production.prec) for production in grammar.Productions],
+        sorted(grammar.Precedence.items()),
+    ))
+
+    return hashlib.sha256(description.encode("utf-8")).hexdigest()
+
+
+def _load_tables(path: str) -> Optional[_ParsingTables]:
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            lr_action, lr_goto, defaulted_states = json.load(file)
+
+        # JSON objects only have string keys, so the states are stored as pairs and turned back into dictionaries.
+        return _ParsingTables(
+            {state: actions for state, actions in lr_action},
+            {state: gotos for state, gotos in lr_goto},
+            {state: production for state, production in defaulted_states},
+        )
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def _store_tables(path: str, tables: _ParsingTables) -> None:
+    content: List[List[Tuple[int, Any]]] = [
+        list(tables.lr_action.items()),
+        list(tables.lr_goto.items()),
+        list(tables.defaulted_states.items()),
+    ]
+
+    # The cache is only an optimization, so failing to write it, e.g. on a read-only file system, isn't an error.
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+
+        try:
+            with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+                json.dump(content, file, separators=(",", ":"))
+
+            # Writing to a temporary file first means concurrent imports never read a partially written file.
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+    except OSError:
+        pass
 
 
 class EquationParser(Parser):
@@ -50,18 +155,156 @@ class EquationParser(Parser):
     list          : [ list_items ]
     list_items    : expression
                   | list_items , expression
+
+    If `cache_size` is given, the parser keeps the expressions parsed for the last `cache_size` distinct inputs
+    and returns them instead of parsing the same input again. Cached expressions are shared between callers,
+    so they should be treated as immutable.
+
+    `backend` selects how the grammar is parsed: "lalr" runs sly's LALR parser, while "pratt" runs the precedence
+    climbing parser in `kharazmi.pratt`, which is faster and builds the same expressions.
+
+    Function calls in the parsed expressions are resolved against `functions`, or `default_registry` (the one
+    `register_function` adds to) if it isn't given, once they're compiled (see `FunctionRegistry`).
     """
 
-    def __init__(self, list_factory: ListFactory):
+    def __init__(self, list_factory: ListFactory, cache_size: Optional[int] = None, backend: str = "lalr",
+                 functions: Optional[FunctionRegistry] = None):
+        if backend not in _BACKENDS:
+            raise ValueError(f"Parser backend should be one of {', '.join(_BACKENDS)}.")
+
         self._lexer = EquationLexer()
         self._list_factory = list_factory
+        self._functions = functions
+        self._cache: Optional[LRUCache[str, Optional[BaseExpression]]] = None
+        self._pratt: Optional[PrattParser] = None
+
+        if cache_size is not None:
+            self._cache = LRUCache(cache_size)
+
+        if backend == "pratt":
+            self._pratt = PrattParser(list_factory, functions)
 
     def parse(self, inp: str) -> Optional[BaseExpression]:
-        tokens = [t for t in self._lexer.tokenize(inp)]
-        return super().parse(iter(tokens))
+        if self._cache is None:
+            return self._parse(inp)
+
+        return self._cache.get_or_compute(inp, lambda: self._parse(inp))
+
+    def parse_many(self, inputs: Iterable[str], workers: Optional[int] = None,
+                   chunk_size: Optional[int] = None) -> List[Union[BaseExpression, ParseError]]:
+        """
+        Parses many inputs, spreading them over a pool of `workers` processes, one for each CPU by default.
+
+        Returns a result for each input, in the same order: the expression parsed for it, or the `ParseError` (or
+        `LexError`) it failed with, so an invalid input doesn't fail the whole batch. Inputs are sent to the workers
+        in chunks of `chunk_size`, and the expressions come back in the format of `kharazmi.serialization`, which is
+        a lot faster to load than to parse. Lists are built here, so `list_factory` doesn't have to be picklable.
+
+        The parser's cache isn't used. With a single worker, inputs are parsed in this process.
+        """
+
+        inputs = list(inputs)
+        backend = "pratt" if self._pratt is not None else "lalr"
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        if workers == 1 or len(inputs) <= 1:
+            return [_parse_or_error(self, inp) for inp in inputs]
+
+        if chunk_size is None:
+            # A few chunks per worker, so they all keep busy until the end.
+            chunk_size = max(1, min(_MAX_CHUNK_SIZE, len(inputs) // (workers * 4)))
+
+        chunks = [inputs[start:start + chunk_size] for start in range(0, len(inputs), chunk_size)]
+        results: List[Union[BaseExpression, ParseError]] = []
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Chunks come back in order, and are loaded while the workers parse the next ones.
+            for chunk in executor.map(_parse_chunk, itertools.repeat(backend), chunks):
+                results.extend(
+                    loads(result, self._list_factory, self._functions) if isinstance(result, bytes) else result
+                    for result in chunk
+                )
+
+        return results
+
+    def cache_info(self) -> Optional[CacheInfo]:
+        if self._cache is None:
+            return None
+
+        return self._cache.info()
+
+    def clear_cache(self) -> None:
+        if self._cache is not None:
+            self._cache.clear()
+
+    def _parse(self, inp: str) -> Optional[BaseExpression]:
+        if self._pratt is not None:
+            return self._pratt.parse(self._lexer.tokenize(inp))
+
+        return super().parse(self._lexer.tokenize(inp))
+
+    @ classmethod
+    def _build(cls, definitions: List[Tuple[str, Any]]) -> None:
+        """
+        Replaces sly's `Parser._build`, which generates the LALR tables every time the module is imported. That's
+        most of the time it takes to import the parser, so the tables are cached on disk, keyed by a hash of the
+        grammar, and only generated (and written to the cache) when the grammar changes. The cache is kept in
+        `$KHARAZMI_CACHE_DIR`, or `kharazmi` in the user's cache directory, and the tables are generated each time if
+        it can't be used.
+
+        It calls the private steps of sly's `_build`, so the supported versions of sly are pinned in `setup.py`.
+        """
+
+        rules = [(name, value) for name, value in definitions if callable(value) and hasattr(value, "rules")]
+
+        if not cls._Parser__validate_specification():
+            raise YaccError("Invalid parser specification")
+
+        cls._Parser__build_grammar(rules)
+
+        # sly writes the whole LR table to `debugfile`, which isn't cached, so the tables are generated for it.
+        directory = None if cls.debugfile else _cache_directory()
+        path: Optional[str] = None
+        tables: Optional[_ParsingTables] = None
+
+        if directory is not None:
+            path = os.path.join(directory, f"parser-{_grammar_hash(cls._grammar)}.json")
+            tables = _load_tables(path)
+
+        if tables is None:
+            # sly's own step, so conflicts get reported the same way when the tables are generated.
+            if not cls._Parser__build_lrtables():
+                raise YaccError("Can't build parsing tables")
+
+            lrtable: LRTable = cls._lrtable
+            tables = _ParsingTables(lrtable.lr_action, lrtable.lr_goto, lrtable.defaulted_states)
+
+            if cls.debugfile:
+                cls._write_debugfile(lrtable)
+
+            if path is not None:
+                _store_tables(path, tables)
+
+        cls._lrtable = tables
+
+    @ classmethod
+    def _write_debugfile(cls, lrtable: LRTable) -> None:
+        # The same as sly's `_build` does.
+        with open(cls.debugfile, "w") as file:
+            file.write(str(cls._grammar))
+            file.write("\n")
+            file.write(str(lrtable))
+
+        cls.log.info("Parser debugging for %s written to %s", cls.__qualname__, cls.debugfile)
 
     tokens = EquationLexer.tokens
 
+    # sly keeps the position of every value it has ever built, keyed by its id, for as long as the parser lives.
+    # Nothing uses them, and they'd keep growing with each parsed input.
+    track_positions = False
+
     precedence = (
         ("right", LENGTH_OF),
         ("left", PLUS, MINUS),
@@ -170,50 +413,80 @@ class EquationParser(Parser):
 
     @ _("TEXT")
     def expression(self, p) -> BaseExpression:
-        return Text(p.TEXT)
+        return Text.interned(p.TEXT)
 
     @ _("NUMBER")
     def expression(self, p) -> BaseExpression:
-        return Number(p.NUMBER)
+        return Number.interned(p.NUMBER)
 
     @ _("TRUE")
     def expression(self, p) -> BaseExpression:
-        return Boolean(True)
+        return Boolean.interned(True)
 
     @ _("FALSE")
     def expression(self, p) -> BaseExpression:
-        return Boolean(False)
+        return Boolean.interned(False)
 
     @ _("IDENTIFIER '(' arguments ')'")
     def function_call(self, p) -> FunctionExpression:
-        return FunctionExpression(p.IDENTIFIER, p.arguments)
+        return FunctionExpression(p.IDENTIFIER, FunctionArguments(*p.arguments), self._functions)
 
     @_("IDENTIFIER")
     def variable(self, p) -> Variable:
-        return Variable(p.IDENTIFIER)
+        return Variable.interned(p.IDENTIFIER)
 
+    # Arguments and list items are gathered in a python list, and their node is built once the list is complete.
+    # Appending to `FunctionArguments` or `ListItems` would copy the items for each comma, which takes quadratic time.
     @ _("expression")
-    def arguments(self, p) -> FunctionArguments:
-        return FunctionArguments(p.expression)
+    def arguments(self, p) -> List[BaseExpression]:
+        return [p.expression]
 
     @ _("arguments ',' expression")
-    def arguments(self, p) -> FunctionArguments:
-        return p.arguments.append(p.expression)
+    def arguments(self, p) -> List[BaseExpression]:
+        p.arguments.append(p.expression)
+        return p.arguments
 
     @ _("'[' list_items ']'")
     def list(self, p) -> ListExpression:
-        return ListExpression(p.list_items)
+        return ListExpression(ListItems(self._list_factory, *p.list_items))
 
     @ _("expression")
-    def list_items(self, p) -> ListItems:
-        return ListItems(self._list_factory, p.expression)
+    def list_items(self, p) -> List[BaseExpression]:
+        return [p.expression]
 
     @ _("list_items ',' expression")
-    def list_items(self, p) -> ListItems:
-        return p.list_items.append(p.expression)
+    def list_items(self, p) -> List[BaseExpression]:
+        p.list_items.append(p.expression)
+        return p.list_items
 
     def error(self, p) -> NoReturn:
         if p is None:
             raise ParseError(f"Incomplete expression.")
 
         raise ParseError(f"Invalid expression. Error occurred in position {p.index}")
+
+
+def _parse_or_error(parser: EquationParser, inp: str) -> Union[BaseExpression, ParseError]:
+    try:
+        return cast(BaseExpression, parser._parse(inp))
+    except ParseError as e:
+        return e
+
+
+def _parse_chunk(backend: str, inputs: List[str]) -> List[Union[bytes, ParseError]]:
+    """
+    Runs in the worker processes of `EquationParser.parse_many`.
+    """
+
+    if backend not in _worker_parsers:
+        # The list factory doesn't matter, as it isn't serialized.
+        _worker_parsers[backend] = EquationParser(list_factory=list, backend=backend)
+
+    parser = _worker_parsers[backend]
+    results: List[Union[bytes, ParseError]] = []
+
+    for inp in inputs:
+        result = _parse_or_error(parser, inp)
+        results.append(result if isinstance(result, ParseError) else dumps(result))
+
+    return results
@@ -0,0 +1,297 @@
+"""
+Evaluates an expression over large columns of data using several processes, each of them running the columnar engine
+(see `kharazmi.columnar`) on a partition of the rows.
+
+Columns are copied once into `multiprocessing.shared_memory` blocks, which the workers map instead of receiving a
+pickled copy of their partition, and each worker writes its partition's result into a block of its own, which gets
+copied into the result in order. Only the names of these blocks, and the encoded expression, go through pipes.
+
+It requires numpy to be installed, e.g: using `pip install kharazmi[numpy]`.
+"""
+
+import os
+import pickle
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Iterator, List, Mapping, NamedTuple, Optional, Union, cast
+
+import numpy as np
+
+from .columnar import Columns, VectorizedExpression, vectorize
+from .exceptions import EvaluationError, RowEvaluationError
+from .models import BaseExpression, FunctionExpression
+from .registry import default_registry
+from .serialization import dumps, loads
+from .types import ListFactory
+
+
+# Upper bound of the number of rows in a partition. Smaller partitions balance better, larger ones have less overhead.
+_MAX_PARTITION_SIZE = 1 << 20
+
+# Vectorized expressions of the worker processes, by their encoded expression and registry (see `_encode`).
+_worker_expressions: Dict[bytes, VectorizedExpression] = {}
+
+
+class _SharedColumn(NamedTuple):
+    """
+    A 1-D array stored in a shared memory block, which any process can map knowing these.
+    """
+
+    name: str
+    dtype: str
+    length: int
+
+
+class _RowError(NamedTuple):
+    row: int
+    error: BaseException
+
+
+def evaluate_partitioned(expression: BaseExpression, columns: Columns, workers: Optional[int] = None,
+                         partition_size: Optional[int] = None) -> np.ndarray:
+    """
+    Evaluates the expression over all rows of `columns`, like `kharazmi.columnar.evaluate_columns`, spreading
+    partitions of `partition_size` rows over a pool of `workers` processes, one for each CPU by default.
+
+    Columns (and results) of python objects can't be shared between processes, so they raise `EvaluationError`. If
+    evaluating a partition fails, it's split until the row it fails on is found, and `RowEvaluationError` is raised
+    for the first such row, with its index in `row`, and the original error as its cause.
+
+    Registered functions are called in the workers. Functions of `default_registry` must be registered there too,
+    which is the case when they're registered on import, or when processes are forked, while other registries get
+    pickled, along with their functions.
+    """
+
+    vectorized = vectorize(expression)
+    arrays: Dict[str, np.ndarray] = {}
+
+    for name in sorted(expression.variables):
+        if name not in columns:
+            raise ValueError(f"Variable `{name}` does not have a value!")
+
+        arrays[name] = np.asarray(columns[name])
+
+        if arrays[name].ndim != 1:
+            raise ValueError(f"Column `{name}` should be 1-D.")
+
+        if arrays[name].dtype.hasobject:
+            raise EvaluationError(f"Column `{name}` holds python objects, which can't be shared between processes.")
+
+    lengths = {len(array) for array in arrays.values()} or {len(np.asarray(column)) for column in columns.values()}
+
+    if len(lengths) > 1:
+        raise ValueError("All columns should have the same number of rows.")
+
+    length = lengths.pop() if lengths else 0
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if partition_size is None:
+        # A few partitions per worker, so they all keep busy until the end.
+        partition_size = max(1, min(_MAX_PARTITION_SIZE, -(-length // (workers * 4))))
+
+    if workers == 1 or length <= partition_size:
+        result = _evaluate_or_error(vectorized, arrays, 0, length)
+
+        if isinstance(result, _RowError):
+            raise _row_evaluation_error(result)
+
+        return result
+
+    shared_columns: Dict[str, _SharedColumn] = {}
+    blocks: List[SharedMemory] = []
+
+    try:
+        for name, array in arrays.items():
+            block = SharedMemory(create=True, size=max(1, array.nbytes))
+            blocks.append(block)
+            _view(block, array.dtype, len(array))[:] = array
+            shared_columns[name] = _SharedColumn(block.name, array.dtype.str, len(array))
+
+        return _run(_encode(expression), shared_columns, length, workers, partition_size)
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+
+def _run(data: bytes, columns: Dict[str, _SharedColumn], length: int, workers: int, partition_size: int) -> np.ndarray:
+    starts = range(0, length, partition_size)
+    result: Optional[np.ndarray] = None
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque(
+            executor.submit(_evaluate_partition, data, columns, start, min(start + partition_size, length))
+            for start in starts
+        )
+
+        try:
+            # Partitions are copied into the result in order, while the workers evaluate the next ones.
+            for start in starts:
+                partition = pending.popleft().result()
+
+                if isinstance(partition, _RowError):
+                    # Rows before this one have all been evaluated, so it's the first failing row.
+                    raise _row_evaluation_error(partition)
+
+                block = SharedMemory(name=partition.name)
+
+                try:
+                    values = _view(block, np.dtype(partition.dtype), partition.length)
+
+                    if result is None:
+                        result = np.empty(length, dtype=values.dtype)
+                    elif not np.can_cast(values.dtype, result.dtype):
+                        result = result.astype(np.result_type(result.dtype, values.dtype))
+
+                    result[start:start + partition.length] = values
+                    del values
+                finally:
+                    block.close()
+                    block.unlink()
+        finally:
+            # Partitions which won't be copied, e.g. after one of them failed, still have to free their blocks.
+            for future in pending:
+                if not future.cancel() and future.exception() is None:
+                    partition = future.result()
+
+                    if isinstance(partition, _SharedColumn):
+                        block = SharedMemory(name=partition.name)
+                        block.close()
+                        block.unlink()
+
+    return result if result is not None else np.empty(0)
+
+
+def _evaluate_partition(data: bytes, columns: Dict[str, _SharedColumn], start: int,
+                        stop: int) -> Union[_SharedColumn, _RowError]:
+    """
+    Runs in the worker processes of `evaluate_partitioned`.
+    """
+
+    if data not in _worker_expressions:
+        expression, functions = pickle.loads(data)
+        # The list factory doesn't matter, as the columnar engine builds arrays out of lists.
+        _worker_expressions[data] = vectorize(loads(expression, cast(ListFactory, list), functions))
+
+    blocks = {name: SharedMemory(name=column.name) for name, column in columns.items()}
+
+    try:
+        # Views of the blocks only live in `_share_partition`'s frame, so the blocks can be closed once it returns.
+        result = _share_partition(_worker_expressions[data], blocks, columns, start, stop)
+    finally:
+        for block in blocks.values():
+            block.close()
+
+    if result is None:
+        raise EvaluationError("The expression evaluates to python objects, which can't be shared between processes.")
+
+    return result
+
+
+def _share_partition(vectorized: VectorizedExpression, blocks: Dict[str, SharedMemory],
+                     columns: Dict[str, _SharedColumn], start: int,
+                     stop: int) -> Optional[Union[_SharedColumn, _RowError]]:
+    arrays = {name: _view(blocks[name], np.dtype(column.dtype), column.length) for name, column in columns.items()}
+    result = _evaluate_or_error(vectorized, arrays, start, stop)
+
+    if isinstance(result, _RowError):
+        return result
+
+    if result.dtype.hasobject:
+        return None
+
+    block = SharedMemory(create=True, size=max(1, result.nbytes))
+    _view(block, result.dtype, len(result))[:] = result
+    block.close()
+
+    return _SharedColumn(block.name, result.dtype.str, len(result))
+
+
+def _evaluate_or_error(vectorized: VectorizedExpression, arrays: Mapping[str, np.ndarray], start: int,
+                       stop: int) -> Union[np.ndarray, _RowError]:
+    try:
+        return _evaluate_rows(vectorized, arrays, start, stop)
+    except Exception as e:
+        error: BaseException = e
+
+    # Evaluating the rows one by one would take a lot longer, so the failing row is found by bisecting the partition,
+    # assuming rows are evaluated independently.
+    while stop - start > 1:
+        middle = (start + stop) // 2
+
+        try:
+            _evaluate_rows(vectorized, arrays, start, middle)
+            start = middle
+        except Exception:
+            stop = middle
+
+    try:
+        _evaluate_rows(vectorized, arrays, start, stop)
+    except Exception as e:
+        error = e
+
+    # Tracebacks keep the frames, and the views of shared memory in them, alive.
+    error.__traceback__ = None
+    error.__context__ = None
+
+    try:
+        pickle.dumps(error)
+    except Exception:
+        error = EvaluationError(f"{error.__class__.__name__}: {error}")
+
+    return _RowError(start, error)
+
+
+def _evaluate_rows(vectorized: VectorizedExpression, arrays: Mapping[str, np.ndarray], start: int,
+                   stop: int) -> np.ndarray:
+    result = vectorized({name: array[start:stop] for name, array in arrays.items()})
+
+    # Expressions without variables evaluate to a single value, which gets broadcast to the number of rows.
+    if result.ndim == 0:
+        result = np.broadcast_to(result, (stop - start,))
+
+    return result
+
+
+def _encode(expression: BaseExpression) -> bytes:
+    """
+    Encodes the expression along with the registry its function calls are resolved against, or `None` for
+    `default_registry`, which the workers have of their own.
+    """
+
+    registries = {
+        id(node.registry): node.registry for node in _nodes(expression) if isinstance(node, FunctionExpression)
+    }
+
+    if len(registries) > 1:
+        raise EvaluationError("Function calls of the expression should all be resolved against the same registry.")
+
+    registry = next(iter(registries.values()), None)
+
+    try:
+        return pickle.dumps((dumps(expression), registry if registry is not default_registry else None))
+    except Exception as e:
+        raise EvaluationError(f"Functions of the expression's registry can't be sent to the workers: {e}") from e
+
+
+def _nodes(expression: BaseExpression) -> Iterator[BaseExpression]:
+    stack = [expression]
+
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(node._children)
+
+
+def _view(block: SharedMemory, dtype: np.dtype, length: int) -> np.ndarray:
+    return np.ndarray((length,), dtype=dtype, buffer=block.buf)
+
+
+def _row_evaluation_error(row_error: _RowError) -> RowEvaluationError:
+    error = RowEvaluationError(f"Evaluation failed on row {row_error.row}: {row_error.error}", row_error.row)
+    error.__cause__ = row_error.error
+    return error
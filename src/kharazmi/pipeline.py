@@ -0,0 +1,222 @@
+"""
+A streaming pipeline, which evaluates expressions over records read one by one from an iterator, e.g: the rows of a
+CSV or JSON Lines file, so memory use doesn't depend on the size of the input.
+
+Records are taken from the iterator, and evaluated, in chunks of a fixed number of records, and a chunk is dropped
+once its results have been yielded. Readers only keep the fields the expressions use.
+"""
+
+import csv
+import itertools
+import json
+import os
+import re
+
+from typing import Any, Callable, Collection, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, cast
+
+from .models import BaseExpression, CompilationContext, _union_all
+from .types import Evaluator, TypedValue
+
+
+Record = Mapping[str, Any]
+_ChunkEvaluator = Callable[[List[Record]], List[List[TypedValue]]]
+
+DEFAULT_CHUNK_SIZE = 1024
+
+_FORMATS = ("csv", "jsonl")
+
+# Extensions of the files `read_records` knows, by their format.
+_EXTENSIONS: Dict[str, str] = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+}
+
+# Numbers as they're usually written in CSV files. `int` and `float` also accept spaces around them, underscores between
+# digits, and words like "nan" or "Infinity", which are more likely to be text, e.g: codes or names.
+_INTEGER = re.compile(r"[+-]?[0-9]+")
+_FLOAT = re.compile(r"[+-]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?")
+
+# Spelled the same way as the lexer's keywords.
+_BOOLEANS: Dict[str, bool] = {
+    "true": True, "TRUE": True, "True": True,
+    "false": False, "FALSE": False, "False": False,
+}
+
+
+def parse_value(text: str) -> TypedValue:
+    """
+    Converts a CSV field into the value it holds: an integer, a float, a boolean, or the text itself.
+    """
+
+    if _INTEGER.fullmatch(text):
+        try:
+            return cast(TypedValue, int(text))
+        except ValueError:
+            # More digits than python converts to an int at once, which `float` would turn into an infinity.
+            return cast(TypedValue, text)
+
+    if _FLOAT.fullmatch(text):
+        return cast(TypedValue, float(text))
+
+    return cast(TypedValue, _BOOLEANS.get(text, text))
+
+
+def read_csv(path: str, columns: Optional[Collection[str]] = None,
+             delimiter: str = ",") -> Iterator[Dict[str, TypedValue]]:
+    """
+    Lazily reads the rows of a CSV file, whose first row holds the names of its columns, as records. Only the given
+    `columns` are kept, all of them by default, and their fields are converted using `parse_value`.
+    """
+
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        header = next(reader, None)
+
+        if header is None:
+            return
+
+        names = header if columns is None else sorted(columns)
+
+        for name in names:
+            if name not in header:
+                raise ValueError(f"Column `{name}` is not in {path}.")
+
+        indexes = [(name, header.index(name)) for name in names]
+
+        for row in reader:
+            if not row:
+                continue
+
+            if len(row) != len(header):
+                raise ValueError(f"Line {reader.line_num} of {path} has {len(row)} fields, expected {len(header)}.")
+
+            yield {name: parse_value(row[index]) for name, index in indexes}
+
+
+def read_jsonl(path: str, columns: Optional[Collection[str]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily reads a JSON Lines file, which holds a JSON object on each line, as records. Only the given `columns` are
+    kept, all of them by default. Values keep the types JSON gives them.
+    """
+
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+
+            record = json.loads(line)
+
+            if not isinstance(record, dict):
+                raise ValueError(f"Line {line_number} of {path} is not a JSON object.")
+
+            if columns is None:
+                yield record
+            else:
+                yield {name: record[name] for name in columns if name in record}
+
+
+def read_records(path: str, columns: Optional[Collection[str]] = None,
+                 file_format: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Reads a CSV or JSON Lines file, telling which one it is from its extension unless `file_format` is given.
+    """
+
+    if file_format is None:
+        file_format = _EXTENSIONS.get(os.path.splitext(path)[1].lower())
+
+        if file_format is None:
+            raise ValueError(f"Format of {path} is unknown, it should be one of {', '.join(_FORMATS)}.")
+
+    if file_format == "csv":
+        return read_csv(path, columns)
+
+    if file_format == "jsonl":
+        return read_jsonl(path, columns)
+
+    raise ValueError(f"File format should be one of {', '.join(_FORMATS)}.")
+
+
+def evaluate_records(expressions: Sequence[BaseExpression], records: Iterable[Record],
+                     chunk_size: int = DEFAULT_CHUNK_SIZE, lazy: bool = False,
+                     columnar: bool = False) -> Iterator[Tuple[TypedValue, ...]]:
+    """
+    Lazily evaluates the expressions on each record, yielding a tuple holding their results for each one of them, in
+    order. Records are taken `chunk_size` at a time, and each expression is compiled once, `lazy` has the same
+    meaning as in `BaseExpression.compile`.
+
+    If `columnar` is set, each chunk is turned into columns and evaluated by the columnar engine (see
+    `kharazmi.columnar`), which needs numpy.
+    """
+
+    if not expressions:
+        raise ValueError("At least one expression should be given.")
+
+    if chunk_size < 1:
+        raise ValueError("Chunk size should be a positive integer.")
+
+    evaluate_chunk = _columnar_chunk_evaluator(expressions) if columnar else _chunk_evaluator(expressions, lazy)
+    return _evaluate_chunks(evaluate_chunk, iter(records), chunk_size)
+
+
+def _evaluate_chunks(evaluate_chunk: _ChunkEvaluator, records: Iterator[Record],
+                     chunk_size: int) -> Iterator[Tuple[TypedValue, ...]]:
+    while True:
+        chunk = list(itertools.islice(records, chunk_size))
+
+        if not chunk:
+            return
+
+        yield from zip(*evaluate_chunk(chunk))
+
+
+def evaluate_file(expressions: Sequence[BaseExpression], path: str, file_format: Optional[str] = None,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE, lazy: bool = False,
+                  columnar: bool = False) -> Iterator[Tuple[TypedValue, ...]]:
+    """
+    Evaluates the expressions on each record of a CSV or JSON Lines file (see `read_records` and `evaluate_records`),
+    reading only the columns they use.
+    """
+
+    variables = _union_all(expression.variables for expression in expressions)
+    return evaluate_records(expressions, read_records(path, variables, file_format), chunk_size, lazy, columnar)
+
+
+def _chunk_evaluator(expressions: Sequence[BaseExpression], lazy: bool) -> _ChunkEvaluator:
+    evaluators: List[Tuple[Evaluator, bool]] = []
+
+    for expression in expressions:
+        context = CompilationContext(expression, lazy)
+        # Values of the shared nodes are kept in the mapping, so each record needs a copy of its own.
+        evaluators.append((context.compile(expression), context.has_shared_nodes))
+
+    def evaluate_chunk(chunk: List[Record]) -> List[List[TypedValue]]:
+        return [
+            [evaluator(dict(record)) for record in chunk] if copy else list(map(evaluator, chunk))
+            for evaluator, copy in evaluators
+        ]
+
+    return evaluate_chunk
+
+
+def _columnar_chunk_evaluator(expressions: Sequence[BaseExpression]) -> _ChunkEvaluator:
+    import numpy as np
+
+    from .columnar import vectorize
+
+    vectorized = [vectorize(expression) for expression in expressions]
+    variables = sorted(_union_all(expression.variables for expression in expressions))
+
+    def evaluate_chunk(chunk: List[Record]) -> List[List[TypedValue]]:
+        columns: Dict[str, List[Any]] = {}
+
+        for name in variables:
+            try:
+                columns[name] = [record[name] for record in chunk]
+            except KeyError:
+                raise ValueError(f"Variable `{name}` does not have a value!")
+
+        # Expressions without variables evaluate to a single value, which gets broadcast to the number of records.
+        return [np.broadcast_to(evaluate(columns), (len(chunk),)).tolist() for evaluate in vectorized]
+
+    return evaluate_chunk
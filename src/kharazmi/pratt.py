@@ -0,0 +1,211 @@
+"""
+A precedence climbing parser for the grammar documented in `EquationParser`, which builds the same expressions as the
+LALR parser sly generates for it, without calling back into python for each reduction.
+
+Operators bind the same way they do in `EquationParser.precedence`: an operator's operand extends over the operators
+binding tighter than it, and operators binding equally tight are left associative. Pending operators, parentheses,
+lists, function calls and IFs are kept on an explicit stack rather than python's call stack, so deeply nested inputs
+parse just like they do using the LALR parser. Syntax errors are reported on the same token, with the same message.
+
+Use it through `EquationParser(..., backend="pratt")`.
+"""
+
+from typing import Any, Callable, Dict, Iterator, List, NoReturn, Optional, Tuple
+
+from .exceptions import ParseError
+from .lexer import Token
+from .models import (AdditionExpression, AndExpression, BaseExpression, Boolean, ContainsExpression,
+                     DivisionExpression, EqualExpression, ExponentiationExpression, FunctionArguments,
+                     FunctionExpression, GreaterThanExpression, GreaterThanOrEqualExpression, IfExpression,
+                     LengthExpression, LessThanExpression, LessThanOrEqualExpression, ListExpression, ListItems,
+                     MultiplicationExpression, NegativeExpression, NotContainsExpression, NotEqualExpression,
+                     NotExpression, Number, OrExpression, SubtractionExpression, Text, Variable)
+from .registry import FunctionRegistry
+from .types import ListFactory
+
+
+# Binding power of the binary operators, the higher the tighter. They match `EquationParser.precedence`.
+_BINARY_OPERATORS: Dict[str, Tuple[int, Callable[[BaseExpression, BaseExpression], BaseExpression]]] = {
+    "PLUS": (2, AdditionExpression),
+    "MINUS": (2, SubtractionExpression),
+    "TIMES": (3, MultiplicationExpression),
+    "DIVIDE": (3, DivisionExpression),
+    "POWER": (4, ExponentiationExpression),
+    "EQUAL": (5, EqualExpression),
+    "NOT_EQUAL": (5, NotEqualExpression),
+    "LESS_THAN": (5, LessThanExpression),
+    "GREATER_THAN": (5, GreaterThanExpression),
+    "LESS_THAN_OR_EQUAL": (5, LessThanOrEqualExpression),
+    "GREATER_THAN_OR_EQUAL": (5, GreaterThanOrEqualExpression),
+    "IN": (5, ContainsExpression),
+    "NOT_IN": (5, NotContainsExpression),
+    "OR": (6, OrExpression),
+    "AND": (7, AndExpression),
+}
+
+# `length of` binds looser than any binary operator, so its operand is the whole expression following it, while the
+# negation and `!` bind tighter, so theirs is a single operand.
+_PREFIX_OPERATORS: Dict[str, Tuple[int, Callable[[BaseExpression], BaseExpression]]] = {
+    "LENGTH_OF": (1, LengthExpression),
+    "NOT": (8, NotExpression),
+    "MINUS": (9, NegativeExpression),
+}
+
+# Kinds of the frames on the parser's stack. Operators come first, as they're the only ones operands reduce into.
+_BINARY = 0
+_PREFIX = 1
+_PARENTHESES = 2
+_FUNCTION = 3
+_LIST = 4
+_IF = 5
+
+# Tokens ending each part of an IF.
+_IF_DELIMITERS = ("THEN", "ELSE", ".")
+
+
+class PrattParser(object):
+    def __init__(self, list_factory: ListFactory, functions: Optional[FunctionRegistry] = None) -> None:
+        self._list_factory = list_factory
+        self._functions = functions
+
+    def parse(self, tokens: Iterator[Token]) -> BaseExpression:
+        binary_operators = _BINARY_OPERATORS
+        prefix_operators = _PREFIX_OPERATORS
+        # Each frame is a tuple starting with its kind, see `_reduce` and the delimiters below for the rest.
+        stack: List[Tuple[Any, ...]] = []
+        token = next(tokens, None)
+
+        while True:
+            # The parser expects an operand here, which may start with any number of prefix operators and opening
+            # delimiters.
+            if token is None:
+                self.error(None)
+
+            type = token.type
+
+            if type in prefix_operators:
+                stack.append((_PREFIX, *prefix_operators[type]))
+                token = next(tokens, None)
+                continue
+
+            if type == "IDENTIFIER":
+                name = token.value
+                token = next(tokens, None)
+
+                if token is not None and token.type == "(":
+                    stack.append((_FUNCTION, name, []))
+                    token = next(tokens, None)
+                    continue
+
+                operand: BaseExpression = Variable.interned(name)
+
+            elif type == "NUMBER":
+                operand = Number.interned(token.value)
+                token = next(tokens, None)
+
+            elif type == "TEXT":
+                operand = Text.interned(token.value)
+                token = next(tokens, None)
+
+            elif type == "TRUE" or type == "FALSE":
+                operand = Boolean.interned(type == "TRUE")
+                token = next(tokens, None)
+
+            elif type == "(":
+                stack.append((_PARENTHESES,))
+                token = next(tokens, None)
+                continue
+
+            elif type == "[":
+                stack.append((_LIST, []))
+                token = next(tokens, None)
+                continue
+
+            elif type == "IF":
+                stack.append((_IF, []))
+                token = next(tokens, None)
+                continue
+
+            else:
+                self.error(token)
+
+            # The parser has an operand here, and `token` tells what to do with it.
+            while True:
+                type = token.type if token is not None else None
+                binary_operator = binary_operators.get(type) if type is not None else None
+
+                # Pending operators binding at least as tight as the next one take the operand first. Anything but a
+                # binary operator ends them all.
+                operand = self._reduce(stack, operand, binary_operator[0] if binary_operator is not None else 0)
+
+                if binary_operator is not None:
+                    stack.append((_BINARY, binary_operator[0], binary_operator[1], operand))
+                    token = next(tokens, None)
+                    break
+
+                if not stack:
+                    if token is None:
+                        return operand
+
+                    self.error(token)
+
+                frame = stack[-1]
+                kind = frame[0]
+
+                if kind == _PARENTHESES:
+                    if type != ")":
+                        self.error(token)
+
+                    stack.pop()
+                    token = next(tokens, None)
+
+                elif kind == _FUNCTION or kind == _LIST:
+                    if type != "," and type != (")" if kind == _FUNCTION else "]"):
+                        self.error(token)
+
+                    frame[-1].append(operand)
+                    token = next(tokens, None)
+
+                    if type == ",":
+                        break
+
+                    stack.pop()
+
+                    if kind == _FUNCTION:
+                        operand = FunctionExpression(frame[1], FunctionArguments(*frame[2]), self._functions)
+                    else:
+                        operand = ListExpression(ListItems(self._list_factory, *frame[1]))
+
+                else:
+                    parts: List[BaseExpression] = frame[1]
+
+                    if type != _IF_DELIMITERS[len(parts)]:
+                        self.error(token)
+
+                    parts.append(operand)
+                    token = next(tokens, None)
+
+                    if len(parts) < len(_IF_DELIMITERS):
+                        break
+
+                    stack.pop()
+                    operand = IfExpression(*parts)
+
+    @staticmethod
+    def _reduce(stack: List[Tuple[Any, ...]], operand: BaseExpression, binding_power: int) -> BaseExpression:
+        # Operator frames are (kind, binding power, node class), and binary ones have their left operand last.
+        while stack and stack[-1][0] <= _PREFIX and stack[-1][1] >= binding_power:
+            frame = stack.pop()
+
+            if frame[0] == _BINARY:
+                operand = frame[2](frame[3], operand)
+            else:
+                operand = frame[2](operand)
+
+        return operand
+
+    def error(self, token: Optional[Token]) -> NoReturn:
+        if token is None:
+            raise ParseError("Incomplete expression.")
+
+        raise ParseError(f"Invalid expression. Error occurred in position {token.index}")
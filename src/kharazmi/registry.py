@@ -0,0 +1,138 @@
+import inspect
+
+from typing import Dict, Hashable, Iterator, Mapping, Optional, Set, Union, cast
+
+from .cache import CacheInfo, LRUCache, constant_key
+from .types import AsyncFunction, Function, TypedValue
+
+
+# Number of results kept for each pure function, unless `cache_size` is given.
+_DEFAULT_CACHE_SIZE = 1024
+
+
+class FunctionRegistry(object):
+    """
+    The functions expressions can call, by name.
+
+    Each `EquationParser` can be given a registry of its own, and the function calls it parses are resolved against
+    it, so different parsers can give the same name to different functions, or not have it at all. Parsers that
+    aren't given one share `default_registry`, which is the one `register_function` adds to.
+
+    Names are resolved once, when an expression is compiled (or turned into code, a program for the vm, etc.), so
+    calling a function that isn't registered fails right there, and evaluating the result doesn't look them up again.
+
+    Functions registered as `pure` get their results cached, see `register`.
+    """
+
+    def __init__(self, functions: Optional[Mapping[str, Union[Function, AsyncFunction]]] = None) -> None:
+        self.functions: Dict[str, Union[Function, AsyncFunction]] = {}
+        # Names of the coroutine functions, which can only be called by `evaluate_async`.
+        self._async_functions: Set[str] = set()
+
+        for name, runner in (functions or {}).items():
+            self.register(name, runner)
+
+    def register(self, name: str, runner: Union[Function, AsyncFunction], pure: bool = False,
+                 cache_size: Optional[int] = None) -> None:
+        """
+        Registers `runner` by the given name, replacing the function registered by it, if there's one.
+
+        If `pure` is set, i.e. the function always returns the same result for the same arguments and has no side
+        effects, the results of its last `cache_size` (1024 by default) distinct calls are cached, and calling it with
+        the same arguments again returns the cached result. Calls with unhashable arguments, e.g: numpy arrays, are
+        not cached. `cache_info` gives the number of hits and misses of the cache.
+
+        Expressions compiled before a function gets replaced keep calling the previous one.
+        """
+
+        if not pure and cache_size is not None:
+            raise ValueError("Only pure functions can be cached.")
+
+        if pure:
+            if inspect.iscoroutinefunction(runner):
+                raise ValueError("Results of coroutine functions can't be cached.")
+
+            runner = _MemoizedFunction(cast(Function, runner), cache_size or _DEFAULT_CACHE_SIZE)
+
+        self.functions[name] = runner
+
+        if inspect.iscoroutinefunction(runner):
+            self._async_functions.add(name)
+        else:
+            self._async_functions.discard(name)
+
+    def resolve(self, name: str) -> Function:
+        """
+        Returns the function registered by this name, to be called synchronously.
+        """
+
+        try:
+            function = self.functions[name]
+        except KeyError:
+            raise ValueError(f"Function `{name}` has not been defined!") from None
+
+        if name in self._async_functions:
+            raise ValueError(f"Function `{name}` is asynchronous, use `evaluate_async` instead.")
+
+        return cast(Function, function)
+
+    def resolve_async(self, name: str) -> Union[Function, AsyncFunction]:
+        """
+        Returns the function registered by this name, which might be a coroutine function.
+        """
+
+        try:
+            return self.functions[name]
+        except KeyError:
+            raise ValueError(f"Function `{name}` has not been defined!") from None
+
+    def cache_info(self, name: str) -> Optional[CacheInfo]:
+        """
+        Statistics of the cache of the function registered by this name, or `None` if it isn't pure.
+        """
+
+        function = self.resolve_async(name)
+
+        if not isinstance(function, _MemoizedFunction):
+            return None
+
+        return function.cache.info()
+
+    def copy(self) -> "FunctionRegistry":
+        return FunctionRegistry(self.functions)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.functions
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.functions)
+
+    def __len__(self) -> int:
+        return len(self.functions)
+
+
+default_registry = FunctionRegistry()
+
+
+class _MemoizedFunction(object):
+    """
+    Calls a pure function through a cache of its results, keyed by the `constant_key` of each of its arguments, so
+    calls with equal arguments which aren't the same constant, e.g: `f(1)` and `f(1.0)`, or `f(0.0)` and `f(-0.0)`,
+    are cached apart.
+    """
+
+    __slots__ = ("function", "cache")
+
+    def __init__(self, function: Function, cache_size: int) -> None:
+        self.function = function
+        self.cache: LRUCache[Hashable, TypedValue] = LRUCache(cache_size)
+
+    def __call__(self, *args: TypedValue) -> TypedValue:
+        key = tuple(map(constant_key, args))
+
+        try:
+            hash(key)
+        except TypeError:
+            return self.function(*args)
+
+        return self.cache.get_or_compute(key, lambda: self.function(*args))
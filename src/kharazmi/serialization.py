@@ -0,0 +1,323 @@
+"""
+A compact, versioned binary encoding for expressions, so parsed expressions can be stored and loaded back without
+parsing them again.
+
+An encoded expression is laid out as:
+
+    magic (b"KHZ") | version (1 byte) | string table | nodes
+
+The string table holds each distinct variable name, function name and text once: their count, followed by each one's
+UTF-8 length and bytes. Nodes are written in post-order, one tag byte each, followed by the tag's operands. Integers are
+written as (zigzag) LEB128 varints, floats as 8 byte doubles and complex numbers as two of them. A node reachable from
+more than one parent (see `kharazmi.optimizer.eliminate_common_subexpressions`) is written once, and referred to by
+its index afterwards, so loading it gives back the same DAG.
+
+List factories are python callables, often lambdas, so they're not encoded: `loads` takes the one to use.
+"""
+
+import struct
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .exceptions import SerializationError
+from .models import (AdditionExpression, AndExpression, BaseBinaryExpression, BaseExpression, BaseUnaryExpression,
+                     Boolean, ContainsExpression, DivisionExpression, EqualExpression, ExponentiationExpression,
+                     FunctionArguments, FunctionExpression, GreaterThanExpression, GreaterThanOrEqualExpression,
+                     IfExpression, LengthExpression, LessThanExpression, LessThanOrEqualExpression, ListExpression,
+                     ListItems, MultiplicationExpression, NegativeExpression, NotContainsExpression, NotEqualExpression,
+                     NotExpression, Number, OrExpression, SubtractionExpression, Text, Variable)
+from .registry import FunctionRegistry
+from .types import ListFactory
+
+
+MAGIC = b"KHZ"
+VERSION = 1
+
+_VARIABLE = 1
+_TEXT = 2
+_INTEGER = 3
+_FLOAT = 4
+_COMPLEX = 5
+_TRUE = 6
+_FALSE = 7
+_FUNCTION = 8
+_LIST = 9
+_REFERENCE = 10
+
+# Tags of the operator nodes. They're a part of the format, so they must never change for a given version.
+_OPERATOR_TAGS: Dict[type, int] = {
+    NegativeExpression: 32,
+    NotExpression: 33,
+    LengthExpression: 34,
+    AdditionExpression: 64,
+    SubtractionExpression: 65,
+    MultiplicationExpression: 66,
+    DivisionExpression: 67,
+    ExponentiationExpression: 68,
+    EqualExpression: 69,
+    NotEqualExpression: 70,
+    LessThanExpression: 71,
+    LessThanOrEqualExpression: 72,
+    GreaterThanExpression: 73,
+    GreaterThanOrEqualExpression: 74,
+    AndExpression: 75,
+    OrExpression: 76,
+    ContainsExpression: 77,
+    NotContainsExpression: 78,
+    IfExpression: 96,
+}
+
+_OPERATORS: Dict[int, Callable[..., BaseExpression]] = {tag: operator for operator, tag in _OPERATOR_TAGS.items()}
+
+# Number of operands of the operator nodes, by tag.
+_ARITIES: Dict[int, int] = {
+    tag: 1 if issubclass(operator, BaseUnaryExpression) else 2 if issubclass(operator, BaseBinaryExpression) else 3
+    for operator, tag in _OPERATOR_TAGS.items()
+}
+
+_DOUBLE = struct.Struct("<d")
+_COMPLEX_DOUBLES = struct.Struct("<dd")
+
+
+def dumps(expression: BaseExpression) -> bytes:
+    """
+    Encodes an expression, see the module's documentation for the format.
+    """
+
+    return _Encoder().encode(expression)
+
+
+def loads(data: bytes, list_factory: ListFactory, functions: Optional[FunctionRegistry] = None) -> BaseExpression:
+    """
+    Decodes an expression encoded by `dumps`. List literals are built using `list_factory`, and function calls
+    resolved against `functions` (`default_registry` if not given), just like `EquationParser`'s. Variables and
+    constants are shared with the other expressions, the same way the parser does.
+    """
+
+    return _Decoder(data, list_factory, functions).decode()
+
+
+class _Encoder(object):
+    def __init__(self) -> None:
+        self._strings: Dict[str, int] = {}
+        self._nodes = bytearray()
+        self._indexes: Dict[int, int] = {}
+
+    def encode(self, expression: BaseExpression) -> bytes:
+        # Deep expressions would overflow python's recursion limit, so the tree is walked using an explicit stack.
+        stack: List[Tuple[BaseExpression, bool]] = [(expression, False)]
+
+        while stack:
+            node, children_written = stack.pop()
+
+            if id(node) in self._indexes:
+                self._nodes.append(_REFERENCE)
+                self._write_unsigned(self._nodes, self._indexes[id(node)])
+                continue
+
+            if children_written:
+                self._write_node(node)
+
+                # Leaves are interned when they're loaded, so only the other nodes need to be referred to.
+                if node._children:
+                    self._indexes[id(node)] = len(self._indexes)
+
+                continue
+
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(node._children))
+
+        header = bytearray(MAGIC)
+        header.append(VERSION)
+        self._write_unsigned(header, len(self._strings))
+
+        for string in self._strings:
+            encoded = string.encode("utf-8")
+            self._write_unsigned(header, len(encoded))
+            header += encoded
+
+        return bytes(header + self._nodes)
+
+    def _write_node(self, node: BaseExpression) -> None:
+        nodes = self._nodes
+
+        if isinstance(node, Variable):
+            nodes.append(_VARIABLE)
+            self._write_unsigned(nodes, self._string(node._name))
+
+        elif isinstance(node, Text):
+            nodes.append(_TEXT)
+            self._write_unsigned(nodes, self._string(node._value))
+
+        elif isinstance(node, Boolean):
+            nodes.append(_TRUE if node._value else _FALSE)
+
+        elif isinstance(node, Number):
+            value = node._value
+
+            if type(value) is int:
+                nodes.append(_INTEGER)
+                # Zigzag encoding, so small negative numbers take a few bytes too.
+                self._write_unsigned(nodes, value * 2 if value >= 0 else -value * 2 - 1)
+            elif type(value) is float:
+                nodes.append(_FLOAT)
+                nodes += _DOUBLE.pack(value)
+            else:
+                nodes.append(_COMPLEX)
+                nodes += _COMPLEX_DOUBLES.pack(value.real, value.imag)
+
+        elif isinstance(node, FunctionExpression):
+            nodes.append(_FUNCTION)
+            self._write_unsigned(nodes, self._string(node._name))
+            self._write_unsigned(nodes, len(node._children))
+
+        elif isinstance(node, ListExpression):
+            nodes.append(_LIST)
+            self._write_unsigned(nodes, len(node._children))
+
+        elif type(node) in _OPERATOR_TAGS:
+            nodes.append(_OPERATOR_TAGS[type(node)])
+
+        else:
+            raise SerializationError(f"`{node.__class__.__name__}` can not be serialized.")
+
+    def _string(self, string: str) -> int:
+        return self._strings.setdefault(string, len(self._strings))
+
+    @staticmethod
+    def _write_unsigned(buffer: bytearray, value: int) -> None:
+        while value > 0x7F:
+            buffer.append((value & 0x7F) | 0x80)
+            value >>= 7
+
+        buffer.append(value)
+
+
+class _Decoder(object):
+    def __init__(self, data: bytes, list_factory: ListFactory, functions: Optional[FunctionRegistry]) -> None:
+        self._data = data
+        self._list_factory = list_factory
+        self._functions = functions
+        self._position = 0
+
+    def decode(self) -> BaseExpression:
+        data = self._data
+
+        if data[:len(MAGIC)] != MAGIC:
+            raise SerializationError("Data is not a serialized expression.")
+
+        if len(data) <= len(MAGIC) or data[len(MAGIC)] != VERSION:
+            raise SerializationError(f"Unsupported serialization format version, expected {VERSION}.")
+
+        self._position = len(MAGIC) + 1
+
+        try:
+            strings = [self._read_string() for _ in range(self._read_unsigned())]
+            return self._decode_nodes(strings)
+        except (IndexError, struct.error, UnicodeDecodeError):
+            raise SerializationError("Serialized expression is truncated or corrupted.") from None
+
+    def _decode_nodes(self, strings: List[str]) -> BaseExpression:
+        data = self._data
+        read_unsigned = self._read_unsigned
+        operators = _OPERATORS
+        arities = _ARITIES
+        stack: List[BaseExpression] = []
+        # Non-leaf nodes, in the order they're decoded, which references refer to.
+        nodes: List[BaseExpression] = []
+
+        while self._position < len(data):
+            tag = data[self._position]
+            self._position += 1
+            node: BaseExpression
+
+            if tag in operators:
+                arity = arities[tag]
+                operands = stack[len(stack) - arity:]
+
+                if len(operands) != arity:
+                    raise SerializationError("Serialized expression is truncated or corrupted.")
+
+                del stack[len(stack) - arity:]
+                node = operators[tag](*operands)
+
+            elif tag == _VARIABLE:
+                node = Variable.interned(strings[read_unsigned()])
+
+            elif tag == _INTEGER:
+                value = read_unsigned()
+                node = Number.interned_value(value // 2 if value % 2 == 0 else -(value + 1) // 2)
+
+            elif tag == _FLOAT:
+                node = Number.interned_value(_DOUBLE.unpack_from(data, self._position)[0])
+                self._position += _DOUBLE.size
+
+            elif tag == _TEXT:
+                node = Text.interned(strings[read_unsigned()])
+
+            elif tag == _TRUE or tag == _FALSE:
+                node = Boolean.interned(tag == _TRUE)
+
+            elif tag == _COMPLEX:
+                node = Number.interned_value(complex(*_COMPLEX_DOUBLES.unpack_from(data, self._position)))
+                self._position += _COMPLEX_DOUBLES.size
+
+            elif tag == _FUNCTION:
+                name = strings[read_unsigned()]
+                node = FunctionExpression(name, FunctionArguments(*self._pop(stack, read_unsigned())), self._functions)
+
+            elif tag == _LIST:
+                node = ListExpression(ListItems(self._list_factory, *self._pop(stack, read_unsigned())))
+
+            elif tag == _REFERENCE:
+                stack.append(nodes[read_unsigned()])
+                continue
+
+            else:
+                raise SerializationError(f"Unknown node tag {tag}.")
+
+            if node._children:
+                nodes.append(node)
+
+            stack.append(node)
+
+        if len(stack) != 1:
+            raise SerializationError("Serialized expression is truncated or corrupted.")
+
+        return stack[0]
+
+    @staticmethod
+    def _pop(stack: List[BaseExpression], count: int) -> List[BaseExpression]:
+        if count > len(stack):
+            raise SerializationError("Serialized expression is truncated or corrupted.")
+
+        items = stack[len(stack) - count:]
+        del stack[len(stack) - count:]
+        return items
+
+    def _read_unsigned(self) -> int:
+        data = self._data
+        value = 0
+        shift = 0
+
+        while True:
+            byte = data[self._position]
+            self._position += 1
+            value |= (byte & 0x7F) << shift
+
+            if byte < 0x80:
+                return value
+
+            shift += 7
+
+    def _read_string(self) -> str:
+        length = self._read_unsigned()
+        end = self._position + length
+
+        if end > len(self._data):
+            raise SerializationError("Serialized expression is truncated or corrupted.")
+
+        string = self._data[self._position:end].decode("utf-8")
+        self._position = end
+        return string
+
@@ -1,17 +1,28 @@
-from typing import Iterable, Protocol, TypeAlias, runtime_checkable, Union
+from typing import Awaitable, Callable, Iterable, Mapping, Protocol, TypeAlias, runtime_checkable, Union
 
 
 TypedValue: TypeAlias = Union["SupportsBoolean", "SupportsArithmetic", "SupportsString", "SupportsList"]
 
 
+Evaluator: TypeAlias = Callable[[Mapping[str, "TypedValue"]], "TypedValue"]
+
+
 class Function(Protocol):
     def __call__(self, *args: "TypedValue") -> "TypedValue": ...
 
 
+class AsyncFunction(Protocol):
+    def __call__(self, *args: "TypedValue") -> Awaitable["TypedValue"]: ...
+
+
 class ListFactory(Protocol):
     def __call__(self, items: Iterable["TypedValue"]) -> "SupportsList": ...
 
 
+class CompiledExpression(Protocol):
+    def __call__(self, **variables_values: "TypedValue") -> "TypedValue": ...
+
+
 @runtime_checkable
 class SupportsBoolean(Protocol):
     """
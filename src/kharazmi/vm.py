@@ -0,0 +1,367 @@
+"""
+A small stack based virtual machine, which runs expressions lowered to a flat array of instructions.
+
+A lowered expression (`Program`) doesn't refer to the expression tree it was built from. It holds a postfix instruction
+stream, stored as an `array` of (opcode, operand) pairs, and the pools its operands index into: constants, variable
+names, functions and operators. Running it is a single loop over the instructions, without any recursion.
+"""
+
+from array import array
+from typing import Any, Callable, Dict, Hashable, List, Mapping, Optional, Sequence, Tuple, Union
+
+from .cache import constant_key
+from .exceptions import EvaluationError
+from .models import (BaseBinaryExpression, BaseExpression, BaseTrinaryExpression, BaseUnaryExpression, Boolean,
+                     FunctionExpression, IfExpression, ListExpression, Number, Text, Variable, _SCALAR_TYPES,
+                     _count_references)
+from .types import Function, TypedValue
+
+
+LOAD_CONST = 0  # pushes constants[operand]
+LOAD_NAME = 1  # pushes the value of variable names[operand]
+LOAD_FUNCTION = 2  # pushes the function registered as functions[operand]
+CALL_FUNCTION = 3  # pops operand arguments and the function below them, pushes the result of the call
+BUILD_LIST = 4  # pops operand items and the list factory below them, pushes the list
+UNARY_OP = 5  # applies operators[operand] to the top of the stack
+BINARY_OP = 6  # pops the right hand side, applies operators[operand] to the left hand side and it
+TRINARY_OP = 7  # pops three operands, pushes the result of applying operators[operand] to them
+IF = 8  # pops the condition; jumps to operand if it's False, see `_Lowering._if_steps`
+ELSE = 9  # jumps to operand, unless the innermost IF is evaluating both of its branches
+END_IF = 10  # if the innermost IF is evaluating both of its branches, pops them and pushes the chosen value
+LOAD_SLOT = 11  # pushes the value stored in slots[operand], or `_UNSET` if there's none
+JUMP_IF_SET = 12  # jumps to operand if the top of the stack is not `_UNSET`, pops it otherwise
+STORE_SLOT = 13  # stores the top of the stack in slots[operand], without popping it
+
+OPCODE_NAMES = (
+    "LOAD_CONST", "LOAD_NAME", "LOAD_FUNCTION", "CALL_FUNCTION", "BUILD_LIST", "UNARY_OP", "BINARY_OP", "TRINARY_OP",
+    "IF", "ELSE", "END_IF", "LOAD_SLOT", "JUMP_IF_SET", "STORE_SLOT",
+)
+
+_JUMPS = frozenset({IF, ELSE, JUMP_IF_SET})
+
+# The operators pool holds, for each node class, the builtin operator used when all of the operands are scalars
+# (if the class has one) and the node's `_apply`, which doesn't depend on the node's state. Both of them return `Any`,
+# like the items of the machine's stack, which hold functions, list factories and `_UNSET` along with values.
+_Operator = Tuple[Optional[Callable[..., Any]], Callable[..., Any]]
+
+_OPERATOR_OPCODES = {1: UNARY_OP, 2: BINARY_OP, 3: TRINARY_OP}
+
+_Step = Union[BaseExpression, Callable[[], Any]]
+
+
+class _Unset(object):
+    def __repr__(self) -> str:
+        return "<unset>"
+
+
+_UNSET = _Unset()
+
+
+class Program(object):
+    """
+    An expression lowered to instructions for the stack machine. Calling it with values for the variables gives the
+    same result as calling `evaluate` on the expression it was lowered from, except that only the chosen branch of an
+    `IF` with a boolean condition is evaluated, so errors in the other branch are not raised.
+    """
+
+    def __init__(self, code: "array[int]", constants: Sequence[Any], names: Sequence[str],
+                 functions: Sequence[Tuple[str, Function]], operators: Sequence[_Operator],
+                 slots: int) -> None:
+        self.code = code
+        self.constants = tuple(constants)
+        self.names = tuple(names)
+        self.functions = tuple(functions)
+        self.operators = tuple(operators)
+        self.slots = slots
+
+    def __call__(self, **variables_values: TypedValue) -> TypedValue:
+        return self.run(variables_values)
+
+    def run(self, variables_values: Mapping[str, TypedValue]) -> TypedValue:
+        code = self.code
+        constants = self.constants
+        names = self.names
+        operators = self.operators
+        scalar_types = _SCALAR_TYPES
+        unset = _UNSET
+
+        stack: List[Any] = []
+        push = stack.append
+        pop = stack.pop
+        # The condition of each IF being run, or `unset` if it was a boolean and only one branch is evaluated.
+        conditions: List[Any] = []
+        slots: List[Any] = [unset] * self.slots
+
+        pc = 0
+        end = len(code)
+
+        while pc < end:
+            opcode = code[pc]
+            operand = code[pc + 1]
+            pc += 2
+
+            if opcode == LOAD_NAME:
+                try:
+                    push(variables_values[names[operand]])
+                except KeyError:
+                    raise ValueError(f"Variable `{names[operand]}` does not have a value!") from None
+
+            elif opcode == LOAD_CONST:
+                push(constants[operand])
+
+            elif opcode == BINARY_OP:
+                right_hand_side = pop()
+                left_hand_side = stack[-1]
+                scalar_operator, apply = operators[operand]
+
+                if scalar_operator is not None and type(left_hand_side) in scalar_types \
+                        and type(right_hand_side) in scalar_types:
+                    stack[-1] = scalar_operator(left_hand_side, right_hand_side)
+                else:
+                    stack[-1] = apply(left_hand_side, right_hand_side)
+
+            elif opcode == UNARY_OP:
+                scalar_operator, apply = operators[operand]
+
+                if scalar_operator is not None and type(stack[-1]) in scalar_types:
+                    stack[-1] = scalar_operator(stack[-1])
+                else:
+                    stack[-1] = apply(stack[-1])
+
+            elif opcode == IF:
+                condition = pop()
+
+                if isinstance(condition, bool):
+                    conditions.append(unset)
+
+                    if not condition:
+                        pc = operand
+                else:
+                    conditions.append(condition)
+
+            elif opcode == ELSE:
+                if conditions[-1] is unset:
+                    conditions.pop()
+                    pc = operand
+
+            elif opcode == END_IF:
+                condition = conditions.pop()
+
+                if condition is not unset:
+                    choice2 = pop()
+                    stack[-1] = operators[operand][1](condition, stack[-1], choice2)
+
+            elif opcode == LOAD_FUNCTION:
+                push(self.functions[operand][1])
+
+            elif opcode == CALL_FUNCTION:
+                arguments = stack[len(stack) - operand:]
+                del stack[len(stack) - operand:]
+                stack[-1] = stack[-1](*arguments)
+
+            elif opcode == BUILD_LIST:
+                items = stack[len(stack) - operand:]
+                del stack[len(stack) - operand:]
+                stack[-1] = stack[-1](items)
+
+            elif opcode == TRINARY_OP:
+                operand3 = pop()
+                operand2 = pop()
+                stack[-1] = operators[operand][1](stack[-1], operand2, operand3)
+
+            elif opcode == LOAD_SLOT:
+                push(slots[operand])
+
+            elif opcode == JUMP_IF_SET:
+                if stack[-1] is not unset:
+                    pc = operand
+                else:
+                    pop()
+
+            elif opcode == STORE_SLOT:
+                slots[operand] = stack[-1]
+
+            else:
+                raise EvaluationError(f"Unknown opcode {opcode} at {pc - 2}.")
+
+        return stack[-1]
+
+    def disassemble(self) -> str:
+        lines: List[str] = []
+
+        for pc in range(0, len(self.code), 2):
+            opcode, operand = self.code[pc], self.code[pc + 1]
+            line = f"{pc:>6} {OPCODE_NAMES[opcode]:<14} {operand}"
+
+            if opcode == LOAD_CONST:
+                line += f" ({self.constants[operand]!r})"
+            elif opcode == LOAD_NAME:
+                line += f" ({self.names[operand]})"
+            elif opcode == LOAD_FUNCTION:
+                line += f" ({self.functions[operand][0]})"
+            elif opcode in (UNARY_OP, BINARY_OP, TRINARY_OP, END_IF):
+                line += f" ({getattr(self.operators[operand][1], '__self__').__class__.__name__})"
+            elif opcode in _JUMPS:
+                line += f" (to {operand})"
+
+            lines.append(line)
+
+        return "\n".join(lines)
+
+
+class _Lowering(object):
+    def __init__(self, root: BaseExpression) -> None:
+        self._references = _count_references(root)
+        self._code: "array[int]" = array("l")
+        self._constants: List[Any] = []
+        self._constant_indexes: Dict[Hashable, int] = {}
+        self._names: Dict[str, int] = {}
+        self._functions: List[Tuple[str, Function]] = []
+        self._operators: Dict[type, int] = {}
+        self._operator_pool: List[_Operator] = []
+        self._slots: Dict[int, int] = {}
+
+    def lower(self, expression: BaseExpression) -> Program:
+        # Deep expressions would overflow python's recursion limit, so the tree is walked using an explicit stack of
+        # steps: a node to lower, or a callable that emits instructions once the nodes before it are lowered.
+        steps: List[_Step] = [expression]
+
+        while steps:
+            step = steps.pop()
+
+            if isinstance(step, BaseExpression):
+                steps.extend(reversed(self._steps(step)))
+            else:
+                step()
+
+        return Program(self._code, self._constants, list(self._names.keys()), self._functions, self._operator_pool,
+                       len(self._slots))
+
+    def _steps(self, expression: BaseExpression) -> List[_Step]:
+        if self._references.get(id(expression), 1) > 1 and expression._children:
+            return self._shared_steps(expression)
+
+        return self._node_steps(expression)
+
+    def _shared_steps(self, expression: BaseExpression) -> List[_Step]:
+        """
+        A node shared by more than one parent (see `kharazmi.optimizer.eliminate_common_subexpressions`) is computed
+        the first time one of its references is run, and its value is stored in a slot the others load it from:
+
+            LOAD_SLOT s; JUMP_IF_SET end; <node>; STORE_SLOT s; end:
+        """
+
+        slot = self._slots.setdefault(id(expression), len(self._slots))
+        jump: List[int] = []
+
+        return [
+            lambda: self._emit(LOAD_SLOT, slot),
+            lambda: jump.append(self._emit(JUMP_IF_SET, 0)),
+            *self._node_steps(expression),
+            lambda: self._emit(STORE_SLOT, slot),
+            lambda: self._patch(jump[0]),
+        ]
+
+    def _node_steps(self, expression: BaseExpression) -> List[_Step]:
+        if isinstance(expression, Variable):
+            name = self._names.setdefault(expression._name, len(self._names))
+            return [lambda: self._emit(LOAD_NAME, name)]
+
+        if isinstance(expression, (Number, Text, Boolean)):
+            constant = self._constant(expression._value)
+            return [lambda: self._emit(LOAD_CONST, constant)]
+
+        if isinstance(expression, FunctionExpression):
+            # Resolved once, here, so an unknown function fails to lower.
+            self._functions.append((expression._name, expression.registry.resolve(expression._name)))
+            function = len(self._functions) - 1
+            arguments = expression._argument._expressions
+
+            return [
+                lambda: self._emit(LOAD_FUNCTION, function),
+                *arguments,
+                lambda: self._emit(CALL_FUNCTION, len(arguments)),
+            ]
+
+        if isinstance(expression, ListExpression):
+            list_factory = self._constant(expression.items._list_factory)
+            items = expression.items._expressions
+
+            return [
+                lambda: self._emit(LOAD_CONST, list_factory),
+                *items,
+                lambda: self._emit(BUILD_LIST, len(items)),
+            ]
+
+        if isinstance(expression, IfExpression):
+            return self._if_steps(expression)
+
+        if isinstance(expression, (BaseUnaryExpression, BaseBinaryExpression, BaseTrinaryExpression)):
+            opcode = _OPERATOR_OPCODES[len(expression._children)]
+            operator = self._operator(expression)
+            return [*expression._children, lambda: self._emit(opcode, operator)]
+
+        raise EvaluationError(f"`{expression.__class__.__name__}` can not be lowered.")
+
+    def _if_steps(self, expression: IfExpression) -> List[_Step]:
+        """
+        <condition>; IF else; <choice1>; ELSE end; else: <choice2>; END_IF; end:
+
+        With a boolean condition only one of the branches is run, IF jumps over the first one if it's False, and ELSE
+        over the second one. Any other condition (e.g: an array) needs both: IF and ELSE fall through, and END_IF
+        picks the values using `IfExpression._apply`, just like `evaluate`.
+        """
+
+        operator = self._operator(expression)
+        branch: List[int] = []
+        skip: List[int] = []
+
+        return [
+            expression._operand1_expression,
+            lambda: branch.append(self._emit(IF, 0)),
+            expression._operand2_expression,
+            lambda: skip.append(self._emit(ELSE, 0)),
+            lambda: self._patch(branch[0]),
+            expression._operand3_expression,
+            lambda: self._emit(END_IF, operator),
+            lambda: self._patch(skip[0]),
+        ]
+
+    def _emit(self, opcode: int, operand: int) -> int:
+        self._code.append(opcode)
+        self._code.append(operand)
+        return len(self._code) - 2
+
+    def _patch(self, jump: int) -> None:
+        self._code[jump + 1] = len(self._code)
+
+    def _constant(self, value: Any) -> int:
+        key = constant_key(value)
+
+        try:
+            if key in self._constant_indexes:
+                return self._constant_indexes[key]
+        except TypeError:
+            # An unhashable list factory, it just doesn't get shared.
+            self._constants.append(value)
+            return len(self._constants) - 1
+
+        self._constant_indexes[key] = len(self._constants)
+        self._constants.append(value)
+        return len(self._constants) - 1
+
+    def _operator(self, expression: BaseExpression) -> int:
+        if type(expression) not in self._operators:
+            scalar_operator: Optional[Callable[..., Any]] = getattr(expression, "_scalar_operator", None)
+            self._operators[type(expression)] = len(self._operator_pool)
+            self._operator_pool.append((scalar_operator, getattr(expression, "_apply")))
+
+        return self._operators[type(expression)]
+
+
+def lower(expression: BaseExpression) -> Program:
+    """
+    Lowers an expression to a `Program` for the stack machine.
+    """
+
+    return _Lowering(expression).lower(expression)
@@ -0,0 +1,162 @@
+"""
+Checks the "pratt" parser backend against the "lalr" one: both have to build expressions with the same `repr`, or fail
+with the same error, for each input.
+"""
+
+import random
+
+from typing import List, Tuple
+
+import pytest
+
+from kharazmi import EquationParser
+from kharazmi.exceptions import ParseError
+from kharazmi.lexer import EquationLexer
+from kharazmi.models import BaseExpression
+from kharazmi.serialization import dumps
+
+
+BINARY_OPERATORS = [
+    "+", "-", "*", "/", "^", "&&", "||", "and", "OR", "==", "is", "!=", "IS NOT", "<", "is less than", "<=",
+    "IS LESS THAN OR EQUAL", ">", "is greater than", ">=", "is greater than or equal", "in", "NOT IN", "not in",
+]
+PREFIX_OPERATORS = ["-", "!", "not ", "NOT ", "length of ", "LENGTH OF "]
+# No complex numbers: `Number` fails on the ones the lexer reads, and the LALR parser only builds a number once it's
+# read the token following it, so an invalid input would fail with a different error, depending on the backend.
+ATOMS = ["x", "y", "total_1", "island", "2", "3.5", '"text"', '""', "true", "False", "TRUE", "false"]
+
+EDGE_CASES = [
+    # Empty inputs.
+    "", "   ",
+    # Invalid tokens.
+    "$", "x @ y", '"unterminated', "3.5.2", "x # y",
+    # Incomplete or misplaced operators.
+    "1 +", "* 2", "in x", "x not y", "x y", "length of", "!", "x == == y",
+    # Parentheses.
+    "()", "((x)", "x))", "(x) (y)",
+    # IF.
+    "if x then y else z.", "IF x THEN y ELSE z.", "if x then y else z", "if x then y", "if x else y.", "if then y else z.",
+    "if x then y else z. .", "if if a then b else c. then y else z.", "x + if a then b else c. * 2",
+    # Lists.
+    "[1, 2]", "[1, 2", "[1,,2]", "[]", "[,]", "[1, 2,]", "[[1], [2, [3]]]", "x in [1, 2] + [3]",
+    # Function calls.
+    "f(x)", "f(x, y, g(z))", "f(", "f(1,)", "f()", "f(1 2)", "f(,1)", "f x", "(f)(x)", "f(x)(y)",
+]
+
+# Nested deeper than python's recursion limit.
+DEEP_FORMULAS = [
+    "(" * 5_000 + "x" + ")" * 5_000,
+    "- " * 5_000 + "x",
+    "x" + " ^ (x" * 5_000 + ")" * 5_000,
+    "[" * 5_000 + "x" + "]" * 5_000,
+    "x" + " + x" * 5_000,
+    "if x then " * 1_000 + "y" + " else z." * 1_000,
+    "f(" * 1_000 + "x" + ")" * 1_000,
+]
+
+
+def random_expression(rng: random.Random, depth: int) -> str:
+    choice = rng.random()
+
+    if depth == 0 or choice < 0.15:
+        return rng.choice(ATOMS)
+
+    if choice < 0.45:
+        operator = rng.choice(BINARY_OPERATORS)
+        return f"{random_expression(rng, depth - 1)} {operator} {random_expression(rng, depth - 1)}"
+
+    if choice < 0.6:
+        return f"{rng.choice(PREFIX_OPERATORS)}{random_expression(rng, depth - 1)}"
+
+    if choice < 0.7:
+        return f"({random_expression(rng, depth - 1)})"
+
+    if choice < 0.8:
+        items = ", ".join(random_expression(rng, depth - 1) for _ in range(rng.randint(1, 3)))
+        return f"{rng.choice(['f', 'max', 'g2'])}({items})"
+
+    if choice < 0.9:
+        return f"[{', '.join(random_expression(rng, depth - 1) for _ in range(rng.randint(1, 3)))}]"
+
+    parts = [random_expression(rng, depth - 1) for _ in range(3)]
+    return f"{rng.choice(['if', 'IF'])} {parts[0]} then {parts[1]} ELSE {parts[2]}."
+
+
+def mutate(rng: random.Random, formula: str) -> str:
+    """
+    Deletes, duplicates or inserts a token, which makes most formulas invalid.
+    """
+
+    starts = [token.index for token in EquationLexer().tokenize(formula)] + [len(formula)]
+    position = rng.randrange(len(starts) - 1)
+    token = formula[starts[position]:starts[position + 1]]
+    choice = rng.random()
+
+    if choice < 0.4:
+        token = ""
+    elif choice < 0.7:
+        token = token * 2
+    else:
+        token = f"{token} {rng.choice(['(', ')', ',', '.', '[', ']', 'then', 'else', '+', '!', 'x', '1', '$'])} "
+
+    return formula[:starts[position]] + token + formula[starts[position + 1]:]
+
+
+def corpus(seed: int, size: int) -> List[str]:
+    """
+    Generated formulas covering every production of the grammar, followed by invalid variants of half of them.
+    """
+
+    rng = random.Random(seed)
+    formulas = [random_expression(rng, rng.randint(1, 5)) for _ in range(size)]
+    return formulas + [mutate(rng, formula) for formula in formulas[:size // 2]]
+
+
+def outcome(parser: EquationParser, formula: str) -> Tuple[str, str]:
+    try:
+        return "expression", repr(parser.parse(formula))
+    except ParseError as e:
+        return e.__class__.__name__, str(e)
+
+
+@pytest.fixture(scope="module")
+def lalr() -> EquationParser:
+    return EquationParser(list_factory=list)
+
+
+@pytest.fixture(scope="module")
+def pratt() -> EquationParser:
+    return EquationParser(list_factory=list, backend="pratt")
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_generated_corpus(lalr: EquationParser, pratt: EquationParser, seed: int) -> None:
+    formulas = corpus(seed, 1_000)
+    outcomes = [outcome(lalr, formula) for formula in formulas]
+
+    # Both valid and invalid inputs have to be covered.
+    assert {kind for kind, _ in outcomes} >= {"expression", "ParseError"}
+
+    for formula, expected in zip(formulas, outcomes):
+        assert outcome(pratt, formula) == expected, formula
+
+
+@pytest.mark.parametrize("formula", EDGE_CASES)
+def test_edge_cases(lalr: EquationParser, pratt: EquationParser, formula: str) -> None:
+    assert outcome(pratt, formula) == outcome(lalr, formula)
+
+
+@pytest.mark.parametrize("formula", DEEP_FORMULAS, ids=lambda formula: formula[:12])
+def test_deep_nesting(lalr: EquationParser, pratt: EquationParser, formula: str) -> None:
+    expected = lalr.parse(formula)
+    expression = pratt.parse(formula)
+
+    # `repr` is recursive, so deeply nested expressions are compared using their serialized form.
+    assert isinstance(expected, BaseExpression) and isinstance(expression, BaseExpression)
+    assert dumps(expression) == dumps(expected)
+
+
+@pytest.mark.parametrize("formula", ["", "$", "if x then y", "[1,,2]", "f(1,)"])
+def test_errors_are_raised(pratt: EquationParser, formula: str) -> None:
+    with pytest.raises(ParseError):
+        pratt.parse(formula)
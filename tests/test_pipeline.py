@@ -0,0 +1,22 @@
+import pytest
+
+from kharazmi.pipeline import parse_value
+
+
+@pytest.mark.parametrize("text, value", [
+    ("1", 1), ("-7", -7), ("+3", 3), ("007", 7),
+    ("1.5", 1.5), (".5", 0.5), ("5.", 5.0), ("1e3", 1000.0), ("-2.5E-3", -0.0025),
+    ("true", True), ("FALSE", False),
+])
+def test_parse_value(text: str, value: object) -> None:
+    parsed = parse_value(text)
+
+    assert type(parsed) is type(value) and parsed == value
+
+
+@pytest.mark.parametrize("text", [
+    "", "abc", "1_000", " 7 ", "7\n", "nan", "NaN", "inf", "INF", "-inf", "Infinity", "1e", "e3", ".", "1.2.3", "0x10",
+    "١٢", "9" * 5_000,
+])
+def test_parse_value_keeps_text(text: str) -> None:
+    assert parse_value(text) == text
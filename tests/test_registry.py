@@ -0,0 +1,37 @@
+import math
+
+from kharazmi import FunctionRegistry
+
+
+def test_pure_functions_are_cached() -> None:
+    calls = []
+
+    def square(x: float) -> float:
+        calls.append(x)
+        return x * x
+
+    registry = FunctionRegistry()
+    registry.register("square", square, pure=True)
+    function = registry.resolve("square")
+
+    assert [function(3), function(3), function(4)] == [9, 9, 16]
+    assert calls == [3, 4]
+
+
+def test_arguments_are_cached_apart_unless_they_are_the_same_constant() -> None:
+    registry = FunctionRegistry()
+    registry.register("sign", lambda x: math.copysign(1, x), pure=True)
+    registry.register("kind", lambda x: type(x).__name__, pure=True)
+    sign, kind = registry.resolve("sign"), registry.resolve("kind")
+
+    assert [sign(0.0), sign(-0.0)] == [1.0, -1.0]
+    assert [kind(1), kind(1.0), kind(True)] == ["int", "float", "bool"]
+
+
+def test_unhashable_arguments_are_not_cached() -> None:
+    registry = FunctionRegistry()
+    registry.register("total", sum, pure=True)
+    total = registry.resolve("total")
+
+    assert [total([1, 2]), total([1, 2])] == [3, 3]
+    assert registry.cache_info("total").misses == 0
@@ -0,0 +1,82 @@
+import pytest
+
+from kharazmi import EquationParser, FunctionRegistry
+from kharazmi.exceptions import SerializationError
+from kharazmi.models import BaseExpression, Number
+from kharazmi.optimizer import eliminate_common_subexpressions
+from kharazmi.serialization import MAGIC, VERSION, dumps, loads
+
+
+# Between them, these use every node type, and all kinds of numbers.
+ROUND_TRIP = [
+    ("a + b - c * d / e ^ f", {"a": 1, "b": 2, "c": 3, "d": 4, "e": 5, "f": 2}),
+    ("-x + -123456789012345678901234567890", {"x": 1}),
+    ('(x == 1) || (x != 2) && (x < 3)', {"x": 1}),
+    ("(x <= 1) || (x > 2) || (x >= 3)", {"x": 1}),
+    ('!(x in [1, 2, "three"]) || (x not in [true, false])', {"x": 1}),
+    ('if (length of s) > 2 then "long" else "short".', {"s": "kharazmi"}),
+    ("maximum(x, 2, minimum(y, 3))", {"x": 1, "y": 5}),
+]
+
+
+@pytest.fixture
+def functions() -> FunctionRegistry:
+    registry = FunctionRegistry()
+    registry.register("maximum", max)
+    registry.register("minimum", min)
+    return registry
+
+
+@pytest.fixture
+def parser(functions: FunctionRegistry) -> EquationParser:
+    return EquationParser(list_factory=list, functions=functions)
+
+
+def parse(parser: EquationParser, formula: str) -> BaseExpression:
+    expression = parser.parse(formula)
+    assert expression is not None
+    return expression
+
+
+@pytest.mark.parametrize("formula, values", ROUND_TRIP)
+def test_round_trip(parser: EquationParser, functions: FunctionRegistry, formula: str, values: dict) -> None:
+    expression = parse(parser, formula)
+    loaded = loads(dumps(expression), list_factory=list, functions=functions)
+
+    assert repr(loaded) == repr(expression)
+    assert loaded.evaluate(**values) == expression.evaluate(**values)
+
+
+def test_round_trip_floats_and_complex_numbers() -> None:
+    # `Number` truncates the floats the lexer reads, and fails on its complex numbers, so they're built here.
+    expression = Number("2.5e-3") * Number("-0.0") + Number("1e300") / Number("2j")
+
+    assert repr(loads(dumps(expression), list_factory=list)) == repr(expression)
+
+
+def test_round_trip_huge_integers(parser: EquationParser) -> None:
+    # Python refuses to convert ints of more than 4300 digits to strings, which the loaded numbers must not need.
+    expression = parse(parser, "x + 1") + Number.from_value(10 ** 5000)
+
+    assert loads(dumps(expression), list_factory=list).evaluate(x=1) == 10 ** 5000 + 2
+
+
+def test_shared_nodes_stay_shared(parser: EquationParser) -> None:
+    shared = eliminate_common_subexpressions(parse(parser, "(a*b + c)^2 / (a*b + c)"))
+    loaded = loads(dumps(shared), list_factory=list)
+
+    left_hand_side = getattr(getattr(loaded, "_left_hand_side_expression"), "_left_hand_side_expression")
+    assert left_hand_side is getattr(loaded, "_right_hand_side_expression")
+
+
+@pytest.mark.parametrize("data", [
+    b"",
+    b"XYZ" + bytes([VERSION]),
+    MAGIC,
+    MAGIC + bytes([VERSION + 1]),
+    MAGIC + bytes([VERSION, 0, 255]),
+    MAGIC + bytes([VERSION, 0, 64]),
+])
+def test_invalid_data(data: bytes) -> None:
+    with pytest.raises(SerializationError):
+        loads(data, list_factory=list)